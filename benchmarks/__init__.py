@@ -0,0 +1,23 @@
+"""
+Benchmarks of refparser on synthetic corpora.
+
+    python -m benchmarks run --records 100000
+    python -m benchmarks run --format medline --scenario parse --json out.json
+    python -m benchmarks compare --threshold 0.5
+    python -m benchmarks duplicates --records 1000000
+    python -m benchmarks generate --format ris --records 1000000 big.ris
+
+Each scenario reports the records it processes per second, the best of a
+few runs, and the peak memory allocated during a run. Generated corpora are
+kept in the temporary directory (or --corpus-dir) and reused by later runs.
+
+The duplicates command makes labelled duplicates of a corpus and reports
+how fast they are found, and the recall of each fingerprint and of
+all_matches() for each kind of difference between duplicates.
+
+The compare command fails if any scenario has regressed from the committed
+baseline.json. After a change that is meant to alter performance, the
+baseline is updated with:
+
+    python -m benchmarks run --records 5000 --json benchmarks/baseline.json
+"""
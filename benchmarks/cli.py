@@ -0,0 +1,167 @@
+import argparse
+import json
+import sys
+from .corpus import formats, generate_values, write_values
+from .duplicates import DuplicateCorpus, evaluate, fingerprints
+from .regression import baseline_path, load_baseline, regressions, \
+    relative_speed, save_baseline
+from .scenarios import benchmark_keys, run_benchmarks, scenarios
+
+
+def _print_result(key, result):
+    print('{:<28} {:>12,.0f} records/s {:>10.1f} MiB'.format(
+        key, result['records_per_second'], result['peak_memory'] / (1 << 20)))
+
+
+def _run(args):
+    keys = benchmark_keys(args.format or formats, args.scenario)
+    results = run_benchmarks(keys, args.records, args.seed, args.repeat,
+                             args.corpus_dir, _print_result)
+    if args.json is not None:
+        save_baseline(results, args.records, args.seed, args.json)
+    return 0
+
+
+def _compare(args):
+    baseline = load_baseline(args.baseline)
+    expected = baseline['results']
+
+    def report(key, result):
+        print('{:<28} {:>12,.0f} records/s {:>+7.0%} {:>10.1f} MiB'.format(
+            key, result['records_per_second'],
+            relative_speed(result) / relative_speed(expected[key]) - 1,
+            result['peak_memory'] / (1 << 20)))
+
+    keys = [key for key in expected if key.split('.', 1)[1] in scenarios]
+    results = run_benchmarks(keys, baseline['records'], baseline['seed'],
+                             args.repeat, args.corpus_dir, report)
+    if args.json is not None:
+        save_baseline(results, baseline['records'], baseline['seed'],
+                      args.json)
+    found = regressions(expected, results, args.threshold)
+    for key, metric, expected_value, value in found:
+        print('{}: {} regressed from {:,.1f} to {:,.1f}'.format(
+            key, metric, expected_value, value), file=sys.stderr)
+    return 1 if found else 0
+
+
+def _duplicates(args):
+    corpus = DuplicateCorpus(args.format, args.records, args.seed, args.rate,
+                             args.unrelated, args.corpus_dir)
+    results = evaluate(corpus)
+    print('{originals:,} records, {duplicates:,} duplicates, {unrelated:,} '
+          'unrelated records'.format(**results))
+    print('{:,.0f} records fingerprinted/s, {:,.0f} records matched/s'.format(
+        results['fingerprinting_records_per_second'],
+        results['matching_records_per_second']))
+    print('precision of all_matches: {:.4f}'.format(results['precision']))
+    methods = fingerprints + ('all_matches',)
+    print('{:<20}'.format('recall') + ''.join(
+        '{:>28}'.format(method) for method in methods))
+    for group, recall in sorted(results['recall'].items()):
+        print('{:<20}'.format(group) + ''.join(
+            '{:>28.4f}'.format(recall[method]) for method in methods))
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+def _generate(args):
+    with open(args.output, 'w', encoding='utf-8') as f:
+        write_values(f, args.format, generate_values(args.records, args.seed))
+    return 0
+
+
+def _add_corpus_arguments(parser):
+    parser.add_argument('--records', '-n', type=int, default=10000,
+                        help='number of records in the corpus '
+                        '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the generated records')
+
+
+def _add_run_arguments(parser):
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                        help='number of timed runs of each scenario')
+    parser.add_argument('--corpus-dir',
+                        help='directory to keep generated corpora in')
+    parser.add_argument('--json', help='file to write the results to')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark refparser on synthetic corpora.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser(
+        'run', help='run the benchmark scenarios')
+    _add_corpus_arguments(run_parser)
+    run_parser.add_argument('--format', '-f', action='append',
+                            choices=formats,
+                            help='corpus format (all of them by default)')
+    run_parser.add_argument('--scenario', '-s', action='append',
+                            choices=scenarios,
+                            help='scenario to run (all of them by default)')
+    _add_run_arguments(run_parser)
+    run_parser.set_defaults(run=_run)
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare the scenarios with a baseline',
+        description='Run the scenarios of a baseline on the same corpora and '
+        'fail if any of them is slower, or peaks at more memory, than the '
+        'baseline by more than the threshold. Speeds are compared in '
+        'proportion to the speed of the machine, measured by a fixed '
+        'workload that runs before each scenario.')
+    compare_parser.add_argument('--baseline', '-b', default=baseline_path,
+                                help='baseline results (default: the '
+                                'committed benchmarks/baseline.json)')
+    compare_parser.add_argument('--threshold', '-t', type=float,
+                                default=0.4,
+                                help='largest regression allowed, as a '
+                                'fraction of the baseline (default: '
+                                '%(default)s)')
+    _add_run_arguments(compare_parser)
+    compare_parser.set_defaults(run=_compare)
+
+    duplicates_parser = commands.add_parser(
+        'duplicates', help='measure how fast and how well duplicates are '
+        'found',
+        description='Generate labelled duplicates of a corpus, find them '
+        'with the fingerprints and all_matches(), and report the throughput '
+        'along with the recall of each fingerprint, overall and by the '
+        'change made to the duplicates, and the precision of the matches.')
+    _add_corpus_arguments(duplicates_parser)
+    duplicates_parser.add_argument('--format', '-f', default='ris',
+                                   choices=formats,
+                                   help='format of the corpus')
+    duplicates_parser.add_argument('--rate', type=float, default=0.5,
+                                   help='fraction of the records that are '
+                                   'duplicated (default: %(default)s)')
+    duplicates_parser.add_argument('--unrelated', type=float, default=0.1,
+                                   help='unrelated records mixed in with '
+                                   'the duplicates, as a fraction of the '
+                                   'records (default: %(default)s)')
+    duplicates_parser.add_argument('--corpus-dir',
+                                   help='directory to keep generated corpora '
+                                   'in')
+    duplicates_parser.add_argument('--json',
+                                   help='file to write the results to')
+    duplicates_parser.set_defaults(run=_duplicates)
+
+    generate_parser = commands.add_parser(
+        'generate', help='write a synthetic corpus to a file')
+    _add_corpus_arguments(generate_parser)
+    generate_parser.add_argument('--format', '-f', required=True,
+                                 choices=formats)
+    generate_parser.add_argument('output', help='file to write')
+    generate_parser.set_defaults(run=_generate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'repeat', 1) < 1:
+        build_parser().error('--repeat must be at least 1')
+    return args.run(args)
@@ -0,0 +1,180 @@
+"""
+A seeded generator of synthetic RIS and Medline corpora. The records look
+like real journal articles: they have long abstracts, author lists with a
+long tail (up to a few hundred authors), accented names and titles, and
+abbreviated and full journal names. Medline values are wrapped onto
+continuation lines. The same count and seed give the same records in either
+format, so a corpus can be compared with its conversion.
+"""
+import functools
+import hashlib
+import os
+import random
+import sys
+import tempfile
+from refparser import writers
+from refparser.parsers import RISRecord, MedlineRecord
+from refparser.utils import cached_property
+from refparser.writers import RISWriter, MedlineWriter
+
+# record type and writer type of each format
+formats = {
+    'ris': (RISRecord, RISWriter),
+    'medline': (MedlineRecord, MedlineWriter),
+}
+
+_first_names = (
+    'Harvey', 'Ana María', 'José', 'Zoë', 'Søren', 'Łukasz', 'François',
+    'Hélène', 'Jürgen', 'Mei', 'Ngozi', 'Ólafur', 'Çağla', 'Siobhán',
+    'Björn', 'Renée', 'Tomás', 'Ying', 'Priya', 'Kwame', 'Élodie', 'Nikolaj',
+    'Dagný', 'Joaquín', 'Małgorzata', 'Anaïs', 'Hiroshi', 'Fatima', 'Jiří',
+    'Margaret', 'Olusegun', 'Noémie',
+)
+_last_names = (
+    'Cushing', 'García Márquez', 'Müller', 'Ødegaard', 'Nguyễn', 'Dvořák',
+    "O'Brien", 'Smith', 'Kowalczyk', 'Núñez', 'Schrödinger', 'Ibáñez',
+    'Lefèvre', 'Jónsdóttir', 'Öztürk', 'Wang', 'Okafor', 'Gómez', 'Žukauskas',
+    'Brontë', 'Kim', 'Rodríguez', 'Björklund', 'Mbeki', 'van der Berg',
+    'Çelik', 'Søndergaard', 'Tanaka', 'Hernández', 'Patel', 'Fernández',
+    'Wójcik', 'Lindqvist', 'Dubois', 'Ferreira', 'Zhang', 'Andrés',
+)
+_words = (
+    'analysis', 'outcomes', 'patients', 'randomized', 'trial', 'cohort',
+    'association', 'risk', 'mortality', 'treatment', 'therapy', 'clinical',
+    'effect', 'study', 'expression', 'cells', 'protein', 'gene', 'receptor',
+    'function', 'disease', 'chronic', 'acute', 'response', 'surgical',
+    'injury', 'factors', 'population', 'children', 'adults', 'women', 'men',
+    'incidence', 'prevalence', 'screening', 'diagnosis', 'imaging', 'brain',
+    'cardiac', 'renal', 'hepatic', 'pulmonary', 'vascular', 'tumour',
+    'cancer', 'metastatic', 'survival', 'prognosis', 'biomarkers', 'plasma',
+    'serum', 'inflammatory', 'immune', 'infection', 'bacterial', 'viral',
+    'vaccine', 'dose', 'safety', 'efficacy', 'long-term', 'follow-up',
+    'systematic', 'review', 'meta-analysis', 'prospective', 'retrospective',
+    'naïve', 'café-au-lait', 'Ménière', 'Guillain-Barré', 'Sjögren',
+    'Behçet', 'Crohn', 'Hodgkin', 'non-Hodgkin', 'de novo', 'in vivo',
+    'in vitro', 'versus', 'during', 'after', 'before', 'among', 'with',
+    'without', 'and', 'of', 'the', 'in', 'for', 'a', 'on',
+)
+# full name, abbreviated name, print ISSN and online ISSN of each journal
+journals = (
+    ('Journal of Neurosurgery', 'J Neurosurg', '0022-3085', '1933-0693'),
+    ('The New England Journal of Medicine', 'N Engl J Med', '0028-4793',
+     '1533-4406'),
+    ('Lancet (London, England)', 'Lancet', '0140-6736', '1474-547X'),
+    ('BMJ (Clinical research ed.)', 'BMJ', '0959-8138', '1756-1833'),
+    ('JAMA', 'JAMA', '0098-7484', '1538-3598'),
+    ('Science (New York, N.Y.)', 'Science', '0036-8075', '1095-9203'),
+    ('Nature', 'Nature', '0028-0836', '1476-4687'),
+    ('The American Journal of Cardiology', 'Am J Cardiol', '0002-9149',
+     '1879-1913'),
+    ('Annals of Internal Medicine', 'Ann Intern Med', '0003-4819',
+     '1539-3704'),
+    ('Circulation', 'Circulation', '0009-7322', '1524-4539'),
+    ('Proceedings of the National Academy of Sciences of the United States '
+     'of America', 'Proc Natl Acad Sci U S A', '0027-8424', '1091-6490'),
+    ('Developmental Biology', 'Dev Biol', '0012-1606', '1095-564X'),
+    ('Cell', 'Cell', '0092-8674', '1097-4172'),
+    ('Blood', 'Blood', '0006-4971', '1528-0020'),
+    ('Gastroenterology', 'Gastroenterology', '0016-5085', '1528-0012'),
+    ('Gut', 'Gut', '0017-5749', '1468-3288'),
+)
+
+
+def _sentence(rng, low, high):
+    words = rng.choices(_words, k=rng.randint(low, high))
+    return ' '.join(words).capitalize()
+
+
+def _author_count(rng):
+    # most articles have a handful of authors but some have hundreds
+    return min(int(rng.paretovariate(1.2)) + rng.randint(0, 5), 300)
+
+
+def generate_values(count, seed=0):
+    """
+    Returns a generator of count dicts of the property values of synthetic
+    records, as serialized by the writers, made from seed.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        authors = ['{}, {}'.format(rng.choice(_last_names),
+                                   rng.choice(_first_names))
+                   for j in range(_author_count(rng))]
+        full_name, abbreviation, issn, online_issn = rng.choice(journals)
+        start = rng.randint(1, 2000)
+        abstract = '. '.join(_sentence(rng, 8, 30)
+                             for j in range(rng.randint(4, 14))) + '.'
+        yield {
+            'title': _sentence(rng, 6, 25),
+            'abstract': abstract,
+            'authors': authors,
+            'journal_names': {full_name, abbreviation},
+            'issn': issn,
+            'volume': str(rng.randint(1, 400)),
+            'issue': str(rng.randint(1, 12)),
+            'pages': (str(start), str(start + rng.randint(0, 30))),
+        }
+
+
+@functools.lru_cache()
+def source_hash(*modules):
+    """
+    Returns a short hash of the source files of modules. Generated files are
+    named after the hash of the modules that generate them, so that changes
+    to the generators or writers never reuse files generated before them.
+    """
+    digest = hashlib.sha1()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def write_values(f, format, values):
+    """Writes records with the property values in the iterable values to the
+    text file object f in format."""
+    with formats[format][1](f) as writer:
+        for record_values in values:
+            writer.write_values(record_values)
+
+
+class Corpus:
+    """
+    A corpus of count synthetic records made from seed, written in format to
+    a file in directory (a directory for benchmark corpora within the
+    temporary directory by default). The file is generated when its path is
+    first needed and reused as long as it exists, its name including the
+    source_hash() of the generator and the writers.
+    """
+    def __init__(self, format, count, seed=0, directory=None):
+        self.format = format
+        self.count = count
+        self.seed = seed
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(),
+                                     'refparser-benchmarks')
+        self.directory = directory
+
+    @property
+    def record_type(self):
+        return formats[self.format][0]
+
+    def in_format(self, format):
+        """Returns the corpus of the same records in another format."""
+        return Corpus(format, self.count, self.seed, self.directory)
+
+    @cached_property
+    def path(self):
+        path = os.path.join(self.directory, '{}-{}-{}-{}.txt'.format(
+            self.format, self.count, self.seed,
+            source_hash(sys.modules[__name__], writers)))
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            # write under a temporary name so that an interrupted run never
+            # leaves a truncated corpus behind
+            partial = '{}.{}.partial'.format(path, os.getpid())
+            with open(partial, 'w', encoding='utf-8') as f:
+                write_values(f, self.format,
+                             generate_values(self.count, self.seed))
+            os.replace(partial, path)
+        return path
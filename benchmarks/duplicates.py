@@ -0,0 +1,301 @@
+"""
+A generator of labelled duplicates of synthetic records, for measuring how
+fast and how well duplicates are found. Each duplicate is a copy of a record
+of a corpus with some of the changes that set apart the same reference
+exported from different databases:
+
+    reversed_authors    the authors listed in reverse order
+    shuffled_authors    the authors listed in another order
+    stripped_accents    accents removed from the title, abstract and authors
+    abbreviated_journal only the abbreviated journal name
+    full_journal        only the full journal name
+    online_issn         the online ISSN instead of the print ISSN
+    truncated_pages     page ranges like 370-4 instead of 370-374
+    other_format        written in the other format
+
+The key field of each duplicate (ID or PMID) holds its label: the position of
+its record in the corpus and its changes, as in '42:online_issn+other_format'.
+Unrelated records, labelled '-:', are mixed in to catch false matches.
+"""
+import collections
+import os
+import random
+import sys
+import time
+from refparser.matching import all_matches
+from refparser.normalizers import remove_accents
+from refparser import writers
+from refparser.utils import cached_property
+from .corpus import Corpus, formats, generate_values, journals, source_hash
+
+# the chance of each change being made to a duplicate
+change_rates = {
+    'reversed_authors': 0.2,
+    'shuffled_authors': 0.1,
+    'stripped_accents': 0.3,
+    'abbreviated_journal': 0.2,
+    'full_journal': 0.2,
+    'online_issn': 0.3,
+    'truncated_pages': 0.3,
+    'other_format': 0.5,
+}
+
+# the fingerprints whose recall is measured, along with all_matches()
+fingerprints = ('location_fingerprint', 'title_authors_fingerprint')
+
+_journals_by_issn = {journal[2]: journal for journal in journals}
+
+
+def _reverse_authors(values, rng):
+    values['authors'] = values['authors'][::-1]
+
+
+def _shuffle_authors(values, rng):
+    authors = list(values['authors'])
+    rng.shuffle(authors)
+    values['authors'] = authors
+
+
+def _strip_accents(values, rng):
+    values['title'] = remove_accents(values['title'])
+    values['abstract'] = remove_accents(values['abstract'])
+    values['authors'] = list(map(remove_accents, values['authors']))
+
+
+def _abbreviate_journal(values, rng):
+    values['journal_names'] = {_journals_by_issn[values['issn']][1]}
+
+
+def _expand_journal(values, rng):
+    values['journal_names'] = {_journals_by_issn[values['issn']][0]}
+
+
+def _use_online_issn(values, rng):
+    values['issn'] = _journals_by_issn[values['issn']][3]
+
+
+def _truncate_pages(values, rng):
+    start, end = values['pages']
+    if len(end) == len(start) and end != start:
+        # drop the leading digits that the end shares with the start
+        shared = len(os.path.commonprefix([start, end[:-1]]))
+        values['pages'] = (start, end[shared:])
+
+
+_changes = {
+    'reversed_authors': _reverse_authors,
+    'shuffled_authors': _shuffle_authors,
+    'stripped_accents': _strip_accents,
+    'abbreviated_journal': _abbreviate_journal,
+    'full_journal': _expand_journal,
+    'online_issn': _use_online_issn,
+    'truncated_pages': _truncate_pages,
+    'other_format': lambda values, rng: None,
+}
+
+
+def _make_changes(values, changes, rng):
+    """
+    Returns a copy of the dict values with the named changes made to it, and
+    the names of those that changed it. Changes that leave the values as
+    they were, such as shuffling a single author, are left out of the label,
+    except for other_format, which changes the format rather than the values.
+    """
+    made = []
+    for name in changes:
+        changed = dict(values)
+        _changes[name](changed, rng)
+        if changed != values or name == 'other_format':
+            values = changed
+            made.append(name)
+    return values, made
+
+
+def make_label(position, changes):
+    """Returns the label of a duplicate of the record at position with
+    changes, or of an unrelated record if position is None."""
+    return '{}:{}'.format('-' if position is None else position,
+                          '+'.join(changes))
+
+
+def parse_label(label):
+    """Returns the position and changes of a label made by make_label()."""
+    position, changes = label.split(':', 1)
+    return (None if position == '-' else int(position),
+            tuple(changes.split('+')) if changes else ())
+
+
+def generate_duplicates(count, seed=0, rate=0.5, unrelated=0.1):
+    """
+    Returns a generator of (label, values) tuples of duplicates of about rate
+    of the count records made from seed by generate_values(), mixed with
+    about unrelated * count records that duplicate none of them.
+    """
+    rng = random.Random('{}-duplicates'.format(seed))
+    others = generate_values(count, '{}-unrelated'.format(seed))
+    for position, values in enumerate(generate_values(count, seed)):
+        if rng.random() < rate:
+            changes = [name for name, change_rate in change_rates.items()
+                       if rng.random() < change_rate]
+            values, changes = _make_changes(values, changes, rng)
+            yield make_label(position, changes), values
+        if rng.random() < unrelated:
+            yield make_label(None, ()), next(others)
+
+
+def write_labelled_values(writers, format, labelled_values):
+    """
+    Writes the (label, values) tuples of labelled_values with the writers in
+    the dict writers by format, each to the writer of format unless its label
+    includes the other_format change. The label is written to the key field.
+    """
+    for label, values in labelled_values:
+        record_format = format
+        if 'other_format' in parse_label(label)[1]:
+            record_format = 'medline' if format == 'ris' else 'ris'
+        writer = writers[record_format]
+        fields = list(writer.fields_from_values(values))
+        key_field = formats[record_format][0].key_fields[0]
+        # RIS records must start with their type
+        fields.insert(1 if record_format == 'ris' else 0, (key_field, label))
+        writer.write_fields(fields)
+
+
+class DuplicateCorpus:
+    """
+    Labelled duplicates of a Corpus of count records in format made from
+    seed, written to a file per format, with rate and unrelated as taken by
+    generate_duplicates(). The files are generated when their paths are
+    first needed and reused as long as they exist, their names including the
+    source_hash() of the generators and the writers.
+    """
+    def __init__(self, format, count, seed=0, rate=0.5, unrelated=0.1,
+                 directory=None):
+        self.originals = Corpus(format, count, seed, directory)
+        self.rate = rate
+        self.unrelated = unrelated
+
+    @cached_property
+    def paths(self):
+        """A dict of the paths of the duplicates by format."""
+        originals = self.originals
+        name = 'duplicates-{}-{}-{}-{}-{}-{}'.format(
+            originals.format, originals.count, originals.seed, self.rate,
+            self.unrelated,
+            source_hash(sys.modules[__name__], sys.modules[Corpus.__module__],
+                        writers))
+        paths = {format: os.path.join(originals.directory,
+                                      '{}.{}'.format(name, format))
+                 for format in formats}
+        if not all(map(os.path.exists, paths.values())):
+            self._write(paths)
+        return paths
+
+    def _write(self, paths):
+        os.makedirs(self.originals.directory, exist_ok=True)
+        partial = {format: '{}.{}.partial'.format(path, os.getpid())
+                   for format, path in paths.items()}
+        files = {format: open(path, 'w', encoding='utf-8')
+                 for format, path in partial.items()}
+        try:
+            writers = {format: formats[format][1](f)
+                       for format, f in files.items()}
+            write_labelled_values(writers, self.originals.format,
+                                  generate_duplicates(
+                                      self.originals.count,
+                                      self.originals.seed, self.rate,
+                                      self.unrelated))
+            for writer in writers.values():
+                writer.flush()
+        finally:
+            for f in files.values():
+                f.close()
+        for format, path in paths.items():
+            os.replace(partial[format], path)
+
+
+# the fingerprints of a record, along with its label if it's a duplicate
+Fingerprints = collections.namedtuple(
+    'Fingerprints', ('label',) + fingerprints)
+
+
+def _fingerprint(record_type, path):
+    """Returns a list of the Fingerprints of the records in the file at
+    path."""
+    return [Fingerprints(
+                record._first_raw_value(*record_type.key_fields),
+                record.location_fingerprint, record.title_authors_fingerprint)
+            for record in record_type.parse(path)]
+
+
+def evaluate(corpus):
+    """
+    Fingerprints the records of corpus, a DuplicateCorpus, and of its
+    duplicates and matches them with all_matches(). Returns a dict of the
+    numbers of records, the records fingerprinted and matched per second, the
+    recall of each fingerprint and of all_matches(), overall and by change,
+    and the precision of all_matches().
+    """
+    started = time.perf_counter()
+    originals = _fingerprint(corpus.originals.record_type,
+                             corpus.originals.path)
+    duplicates = []
+    for format, path in corpus.paths.items():
+        duplicates += _fingerprint(formats[format][0], path)
+    fingerprinting = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matches = list(all_matches(originals, duplicates))
+    matching = time.perf_counter() - started
+
+    results = {
+        'originals': len(originals),
+        'duplicates': sum(1 for d in duplicates
+                          if parse_label(d.label)[0] is not None),
+        'unrelated': sum(1 for d in duplicates
+                         if parse_label(d.label)[0] is None),
+        'fingerprinting_records_per_second':
+            (len(originals) + len(duplicates)) / fingerprinting,
+        'matching_records_per_second':
+            (len(originals) + len(duplicates)) / matching,
+    }
+    results.update(_quality(originals, duplicates, matches))
+    return results
+
+
+def _hits(duplicate, original, matched):
+    """Returns a dict of whether each fingerprint, and all_matches(), found
+    that duplicate duplicates original."""
+    hits = {method: getattr(duplicate, method) is not None and
+            getattr(duplicate, method) == getattr(original, method)
+            for method in fingerprints}
+    hits['all_matches'] = matched.get(duplicate.label) is original
+    return hits
+
+
+def _quality(originals, duplicates, matches):
+    """Returns a dict of the recall of each method, overall and by change,
+    and of the precision of the matches of the duplicates."""
+    matched = {duplicate.label: match for duplicate, match in matches}
+    totals = collections.Counter()
+    found = collections.Counter()
+    for duplicate in duplicates:
+        position, changes = parse_label(duplicate.label)
+        if position is None:
+            continue
+        hits = _hits(duplicate, originals[position], matched)
+        for group in ('all',) + (changes or ('exact',)):
+            totals[group] += 1
+            for method, hit in hits.items():
+                found[group, method] += hit
+    methods = fingerprints + ('all_matches',)
+    correct = 0
+    for duplicate, match in matches:
+        position = parse_label(duplicate.label)[0]
+        correct += position is not None and originals[position] is match
+    return {
+        'recall': {group: {method: found[group, method] / total
+                           for method in methods}
+                   for group, total in totals.items()},
+        'precision': correct / len(matches) if matches else None,
+    }
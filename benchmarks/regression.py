@@ -0,0 +1,54 @@
+"""
+Comparison of benchmark results with a baseline. A baseline is a JSON file
+written by `python -m benchmarks run --json`, holding the size and seed of
+the corpora along with the results, and the committed baseline.json is the
+one that changes are checked against by `python -m benchmarks compare`.
+"""
+import json
+import os
+
+baseline_path = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# differences in peak memory smaller than this are never regressions, as the
+# peaks of streaming scenarios are too small to be measured precisely
+memory_slack = 1 << 20
+
+
+def load_baseline(path=baseline_path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, count, seed, path=baseline_path):
+    with open(path, 'w') as f:
+        json.dump({'records': count, 'seed': seed, 'results': results}, f,
+                  indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def relative_speed(result):
+    """Returns the records per second of a result in proportion to the speed
+    of the machine at the time, as measured by its calibration."""
+    return result['records_per_second'] * result['calibration']
+
+
+def regressions(baseline, results, threshold=0.4):
+    """
+    Returns a list of (key, metric, baseline value, value) tuples for each
+    result that regressed from the baseline results by more than threshold, a
+    fraction of the baseline value: relative speed that dropped, or peak
+    memory that grew. Results missing from either side are ignored.
+    """
+    found = []
+    for key in sorted(baseline.keys() & results.keys()):
+        expected, result = baseline[key], results[key]
+        speed = relative_speed(result)
+        if speed < relative_speed(expected) * (1 - threshold):
+            found.append((key, 'relative_speed', relative_speed(expected),
+                          speed))
+        memory = result['peak_memory']
+        if memory > expected['peak_memory'] * (1 + threshold) and \
+                memory - expected['peak_memory'] > memory_slack:
+            found.append((key, 'peak_memory', expected['peak_memory'],
+                          memory))
+    return found
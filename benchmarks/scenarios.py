@@ -0,0 +1,209 @@
+"""
+Timed benchmark scenarios. A scenario is a function that takes a Corpus,
+does any preparation that shouldn't be timed and returns a function that runs
+the benchmark once and returns the number of records it processed. Scenarios
+that work on parsed records prepare fresh records for every run, because
+their properties are computed only once.
+"""
+import functools
+import gc
+import random
+import time
+import tracemalloc
+from refparser.matching import all_matches
+from refparser.normalizers import normalize_text_value
+from refparser.parsers import IncrementalParser
+from .corpus import Corpus
+
+# the properties read by the field access scenario
+fields = ('title', 'abstract', 'authors', 'journal_names', 'issn', 'volume',
+          'issue', 'pages')
+
+
+def parse(corpus):
+    """Streams the records from parse()."""
+    def run():
+        return sum(1 for record in corpus.record_type.parse(corpus.path))
+    return run
+
+
+def parse_file(corpus):
+    """Streams the records from parse_file(), extracting their fields."""
+    def run():
+        count = 0
+        for record in corpus.record_type.parse_file(corpus.path):
+            record._raw_field_tokens
+            count += 1
+        return count
+    return run
+
+
+def incremental(corpus, chunk_size=1 << 16):
+    """Feeds the file to an IncrementalParser in chunks."""
+    def run():
+        parser = IncrementalParser(corpus.record_type)
+        count = 0
+        with open(corpus.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                count += len(parser.feed(chunk))
+        return count + len(parser.close())
+    return run
+
+
+def field_access(corpus):
+    """Reads the properties of parsed records."""
+    records = list(corpus.record_type.parse(corpus.path))
+
+    def run():
+        for record in records:
+            for field in fields:
+                getattr(record, field)
+        return len(records)
+    return run
+
+
+def fingerprinting(corpus):
+    """Computes both fingerprints of parsed records."""
+    records = list(corpus.record_type.parse(corpus.path))
+
+    def run():
+        for record in records:
+            record.location_fingerprint
+            record.title_authors_fingerprint
+        return len(records)
+    return run
+
+
+def normalization(corpus):
+    """Normalizes the titles and authors' last names of parsed records with
+    normalize_text_value()."""
+    count = 0
+    values = []
+    for record in corpus.record_type.parse(corpus.path):
+        values.append(record.title)
+        values += record.authors_lastnames
+        count += 1
+
+    def run():
+        for value in values:
+            normalize_text_value(value)
+        return count
+    return run
+
+
+def matching(corpus):
+    """
+    Matches the records against the same records in the other format with
+    all_matches(). The fingerprints are computed beforehand, so only the
+    matching is timed.
+    """
+    other = corpus.in_format('medline' if corpus.format == 'ris' else 'ris')
+    lists = (list(corpus.record_type.parse(corpus.path)),
+             list(other.record_type.parse(other.path)))
+    for record in lists[0] + lists[1]:
+        record.location_fingerprint
+        record.title_authors_fingerprint
+
+    def run():
+        return sum(1 for match in all_matches(*lists))
+    return run
+
+
+scenarios = {
+    'parse': parse,
+    'parse_file': parse_file,
+    'incremental': incremental,
+    'field_access': field_access,
+    'normalization': normalization,
+    'fingerprinting': fingerprinting,
+    'all_matches': matching,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _calibration_words():
+    rng = random.Random(0)
+    return [''.join(rng.choices('abcdefghij ', k=12)) for i in range(100000)]
+
+
+def calibrate(repeat=5):
+    """
+    Returns the best time in seconds of repeat runs of a fixed workload of
+    string handling and sorting, the kind of work parsing is made of. Results
+    are compared in proportion to this time, which makes them comparable
+    between machines, and between runs on a machine whose load varies.
+    """
+    words = _calibration_words()
+    best = None
+    # the first run only warms up, as it is slow at the start of a process
+    for i in range(repeat + 1):
+        started = time.perf_counter()
+        for word in sorted(words):
+            word.strip().split(' ')
+        elapsed = time.perf_counter() - started
+        if i and (best is None or elapsed < best):
+            best = elapsed
+    return best
+
+
+def measure(scenario, corpus, repeat=3):
+    """
+    Runs scenario on corpus and returns a dict of the number of records it
+    processed, the best time of repeat runs in seconds, the records processed
+    per second in that time, the peak memory allocated during a run, in
+    bytes, and the time taken by calibrate() just beforehand. Memory is
+    traced in a separate run, because tracing slows Python down
+    considerably.
+    """
+    # generate the corpus, if needed, before anything is timed
+    corpus.path
+    calibration = calibrate()
+    best = None
+    for i in range(repeat):
+        run = scenario(corpus)
+        gc.collect()
+        started = time.perf_counter()
+        count = run()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    run = scenario(corpus)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'records': count,
+        'seconds': best,
+        'records_per_second': count / best if best else 0.0,
+        'peak_memory': peak,
+        'calibration': calibration,
+    }
+
+
+def benchmark_keys(formats, names=None):
+    """Returns the keys, '<format>.<scenario>', of the scenarios named in
+    names (all of them by default) on corpora in each of formats."""
+    return ['{}.{}'.format(format, name)
+            for format in formats for name in names or scenarios]
+
+
+def run_benchmarks(keys, count, seed=0, repeat=3, directory=None,
+                   report=None):
+    """
+    Measures the scenarios identified by keys, as returned by
+    benchmark_keys(), on corpora of count records made from seed and returns
+    a dict of the results by key. Each result is passed to report, if given,
+    as soon as it is measured.
+    """
+    results = {}
+    for key in keys:
+        format, name = key.split('.', 1)
+        corpus = Corpus(format, count, seed, directory)
+        results[key] = measure(scenarios[name], corpus, repeat)
+        if report is not None:
+            report(key, results[key])
+    return results
@@ -0,0 +1,33 @@
+class RecordBatch:
+    """
+    A columnar batch of records. Each column is a list holding one of the
+    records' properties, with the values of the n-th record at index n of
+    every column.
+    """
+    columns = ('title', 'authors', 'issn', 'volume', 'issue', 'pages',
+               'location_fingerprint', 'title_authors_fingerprint')
+
+    def __init__(self):
+        for column in self.columns:
+            setattr(self, column, [])
+
+    @classmethod
+    def from_records(cls, records):
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    def append(self, record):
+        """Adds the properties of a record to the end of each column."""
+        for column in self.columns:
+            getattr(self, column).append(getattr(record, column))
+
+    def __len__(self):
+        return len(self.title)
+
+    def rows(self):
+        """Returns a generator of dicts mapping each column to its value for
+        one record."""
+        for values in zip(*(getattr(self, column) for column in self.columns)):
+            yield dict(zip(self.columns, values))
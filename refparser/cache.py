@@ -0,0 +1,100 @@
+"""
+A cache of parsed records stored in a directory, keyed by a hash of the
+content of the files the records were parsed from. For every record it keeps
+the raw data, the offsets of each field's values and both fingerprints, so
+that records loaded from the cache don't need to be parsed, normalized or
+fingerprinted again.
+
+Cache files are written with marshal, which isn't secure against data that
+was crafted or tampered with, so a cache directory must be trusted: never
+load records from a directory that others can write to.
+"""
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+
+_magic = b'RPCACHE1'
+# the version of the format of the entries, to be increased whenever they
+# change
+_format_version = 2
+_version = (_format_version, marshal.version)
+# the Python implementation and version that write and read the files
+_python = '{}-{}{}'.format(sys.implementation.name, *sys.version_info[:2])
+
+
+def file_digest(path, block_size=1 << 20):
+    """Returns a hex digest of the content of the file at path."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RecordCache:
+    """
+    A cache of records in directory, which must be trusted as described
+    above. Cache files are named after the content they were parsed from,
+    the record type, the Python implementation and version (whose marshal
+    format may differ) and the format version of the entries, so that files
+    written by other versions are never read.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, record_type, digest):
+        return os.path.join(self.directory, '{}-{}-{}-v{}.rpc'.format(
+            digest, record_type.__name__, _python, _format_version))
+
+    def load(self, record_type, path):
+        """
+        Returns a list of the records of the file at path, loading them from
+        the cache if the same content was parsed before and parsing and
+        caching them otherwise.
+        """
+        cache_path = self.path_for(record_type, file_digest(path))
+        try:
+            return self._read(record_type, cache_path)
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+        records = list(record_type.parse(path))
+        self._write(records, cache_path)
+        return records
+
+    def _read(self, record_type, cache_path):
+        with open(cache_path, 'rb') as f:
+            if f.read(len(_magic)) != _magic:
+                raise ValueError('{} is not a record cache'.format(
+                    cache_path))
+            version, entries = marshal.load(f)
+        if version != _version:
+            raise ValueError('{} has an unsupported version'.format(
+                cache_path))
+        records = []
+        for raw_data, tokens, location, title_authors in entries:
+            record = record_type(raw_data)
+            record._raw_field_tokens = tokens
+            record.location_fingerprint = location
+            record.title_authors_fingerprint = title_authors
+            records.append(record)
+        return records
+
+    def _write(self, records, cache_path):
+        entries = [(record._raw_data, record._raw_field_tokens,
+                    record.location_fingerprint,
+                    record.title_authors_fingerprint)
+                   for record in records]
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary file first so that concurrent loads never see
+        # a partially written cache file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_magic)
+                marshal.dump((_version, entries), f)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,190 @@
+"""
+The refparser command line interface.
+
+    refparser convert --to medline references.ris more.ris.gz
+    refparser convert --to ris --output-dir converted pubmed/*.txt
+    cat references.ris | refparser convert --to medline - > pubmed.txt
+
+Records are streamed from each input to its output, so files of any size are
+converted in constant memory. Several files are converted in parallel in a
+pool of worker processes.
+"""
+import argparse
+import codecs
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from .exceptions import ReferenceSyntaxError, UnknownReferenceFormat
+from .parsers import RISRecord, MedlineRecord, parse_any
+from .writers import RISWriter, MedlineWriter
+
+# record type, writer type and file extension of each format
+formats = {
+    'ris': (RISRecord, RISWriter, '.ris'),
+    'medline': (MedlineRecord, MedlineWriter, '.txt'),
+}
+
+_compressed_extensions = ('.gz', '.bz2', '.xz', '.zip')
+# errors that fail the conversion of a file without stopping the others
+_conversion_errors = (OSError, UnicodeError, ReferenceSyntaxError,
+                      UnknownReferenceFormat)
+
+
+def convert(source, f, to_format, from_format=None, skip_invalid=False,
+            encoding='utf-8', encoding_errors='strict'):
+    """
+    Writes the records parsed from source, in from_format or the detected
+    format if it is None, to the text file object f in to_format. Invalid
+    records are skipped if skip_invalid is true. The source is decoded with
+    encoding, handling invalid bytes according to encoding_errors. Returns
+    the number of records written and the number of errors skipped.
+    """
+    errors = [] if skip_invalid else None
+    if from_format is None:
+        records = parse_any(source, errors=errors, encoding=encoding,
+                            encoding_errors=encoding_errors)
+    else:
+        records = formats[from_format][0].parse(
+            source, errors=errors, encoding=encoding,
+            encoding_errors=encoding_errors)
+    count = 0
+    with formats[to_format][1](f) as writer:
+        for record in records:
+            writer.write(record)
+            count += 1
+    return count, len(errors or ())
+
+
+def output_path(path, to_format, output_dir=None):
+    """Returns the path of the file that the file at path is converted to,
+    named after it with the extension of to_format."""
+    base = os.path.basename(path)
+    root, extension = os.path.splitext(base)
+    if extension.lower() in _compressed_extensions:
+        root, extension = os.path.splitext(root)
+    directory = os.path.dirname(path) if output_dir is None else output_dir
+    return os.path.join(directory, root + formats[to_format][2])
+
+
+def convert_file(path, destination, to_format, from_format=None,
+                 skip_invalid=False, encoding='utf-8',
+                 encoding_errors='strict'):
+    """Converts the file at path to the file at destination, which is removed
+    again if the conversion fails."""
+    f = open(destination, 'w', encoding='utf-8')
+    try:
+        with f:
+            return convert(path, f, to_format, from_format, skip_invalid,
+                           encoding, encoding_errors)
+    except BaseException:
+        os.unlink(destination)
+        raise
+
+
+def _run_convert(args):
+    if args.files == ['-']:
+        try:
+            count, skipped = convert(sys.stdin.buffer, sys.stdout, args.to,
+                                     args.from_format, args.skip_invalid,
+                                     args.encoding, args.encoding_errors)
+        except _conversion_errors as e:
+            _report_error('<stdin>', e)
+            return 1
+        _report('<stdin>', count, skipped, args.quiet)
+        return 0
+    jobs = []
+    for path in args.files:
+        destination = output_path(path, args.to, args.output_dir)
+        if os.path.abspath(destination) == os.path.abspath(path):
+            print('refparser: {}: would be overwritten by its output'.format(
+                path), file=sys.stderr)
+            return 1
+        jobs.append((path, destination))
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    status = 0
+    with ProcessPoolExecutor(args.workers) as executor:
+        futures = [(path, executor.submit(
+                        convert_file, path, destination, args.to,
+                        args.from_format, args.skip_invalid, args.encoding,
+                        args.encoding_errors))
+                   for path, destination in jobs]
+        for path, future in futures:
+            try:
+                count, skipped = future.result()
+            except _conversion_errors as e:
+                _report_error(path, e)
+                status = 1
+            else:
+                _report(path, count, skipped, args.quiet)
+    return status
+
+
+def _report_error(path, e):
+    print('refparser: {}: {}'.format(path, str(e) or type(e).__name__),
+          file=sys.stderr)
+
+
+def _report(path, count, skipped, quiet):
+    if quiet:
+        return
+    message = '{}: {} records'.format(path, count)
+    if skipped:
+        message += ', {} invalid records skipped'.format(skipped)
+    print(message, file=sys.stderr)
+
+
+def _encoding(name):
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        raise argparse.ArgumentTypeError('unknown encoding: ' + name)
+    return name
+
+
+def _encoding_errors(name):
+    try:
+        codecs.lookup_error(name)
+    except LookupError:
+        raise argparse.ArgumentTypeError('unknown error handler: ' + name)
+    return name
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='refparser', description='Work with RIS and Medline files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert_parser = commands.add_parser(
+        'convert', help='convert files between RIS and Medline',
+        description='Convert files between RIS and Medline. Each file is '
+        'written next to it (or to the output directory) with the extension '
+        'of the output format. A single - converts stdin to stdout.')
+    convert_parser.add_argument('files', nargs='+', metavar='FILE')
+    convert_parser.add_argument('--to', required=True, choices=formats,
+                                help='output format')
+    convert_parser.add_argument('--from', dest='from_format', choices=formats,
+                                help='input format (detected by default)')
+    convert_parser.add_argument('--output-dir', '-d',
+                                help='directory to write the output files to')
+    convert_parser.add_argument('--workers', '-j', type=int,
+                                help='number of files to convert in parallel '
+                                '(number of CPUs by default)')
+    convert_parser.add_argument('--encoding', type=_encoding,
+                                default='utf-8',
+                                help='encoding of the input (default utf-8)')
+    convert_parser.add_argument('--encoding-errors', type=_encoding_errors,
+                                default='strict',
+                                help='how to handle bytes that are invalid '
+                                'in the encoding: strict (the default), '
+                                'replace or ignore')
+    convert_parser.add_argument('--skip-invalid', action='store_true',
+                                help='skip invalid records instead of failing')
+    convert_parser.add_argument('--quiet', '-q', action='store_true',
+                                help="don't report the number of records")
+    convert_parser.set_defaults(run=_run_convert)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
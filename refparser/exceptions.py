@@ -1,8 +1,21 @@
 class ReferenceSyntaxError(Exception):
     """
-    Syntax error during parsing.
+    Syntax error during parsing. The number of the offending line (counting
+    from 1) and its offset from the start of the data are included when they
+    are known. The offset is in bytes, except for data passed as text, whose
+    offsets are in characters.
     """
-    pass
+    def __init__(self, reason='invalid syntax', line_number=None,
+                 offset=None):
+        super().__init__(reason, line_number, offset)
+        self.reason = reason
+        self.line_number = line_number
+        self.offset = offset
+
+    def __str__(self):
+        if self.line_number is None:
+            return self.reason
+        return '{} (line {})'.format(self.reason, self.line_number)
 
 
 class UnknownReferenceFormat(Exception):
@@ -10,3 +23,11 @@ class UnknownReferenceFormat(Exception):
     The format of the refrences data file is unknown.
     """
     pass
+
+
+class ReferenceSizeError(ReferenceSyntaxError):
+    """
+    A record, or one of its fields, is larger than the limit set for it. The
+    line number and offset are those of the start of the record.
+    """
+    pass
@@ -0,0 +1,141 @@
+"""
+A persistent index of the byte offsets of every record in a references file.
+The index is stored in a sidecar file next to the data (`<path>.idx` by
+default) so that individual records can be read without rescanning the file.
+
+The sidecar file is laid out as:
+
+    8 bytes     magic number
+    4 bytes     length of the JSON header (unsigned, little-endian)
+    header      JSON object: record type, data file size & mtime, counts
+    offsets     unsigned 64-bit little-endian (start, end) pairs
+    keys        JSON object mapping record keys (eg, ID or PMID) to positions
+"""
+import json
+import os
+import struct
+import sys
+from array import array
+from .utils import map_file, data_start
+
+_magic = b'RPIDX001'
+_header_length = struct.Struct('<I')
+# the indexes returned by for_file() by the absolute path of their sidecar
+# file, reused for as long as they are current, and how many are kept
+_loaded = {}
+_max_loaded = 32
+
+
+class RecordIndex:
+    def __init__(self, record_type, offsets, keys, size=None, mtime_ns=None):
+        self.record_type = record_type
+        self.offsets = offsets
+        self.keys = keys
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def build(cls, record_type, path):
+        """
+        Scans the file at path and returns an index of its records. Each
+        record's key is the first value of one of the record type's key
+        fields.
+        """
+        stat = os.stat(path)
+        offsets = array('Q')
+        keys = {}
+        buffer = map_file(path)
+        for position, (start, end) in enumerate(
+                record_type.split_buffer(buffer, data_start(buffer))):
+            offsets.append(start)
+            offsets.append(end)
+            key = record_type.from_buffer(buffer, start, end) \
+                ._first_raw_value(*record_type.key_fields)
+            if key and key not in keys:
+                keys[key] = position
+        return cls(record_type.__name__, offsets, keys,
+                   stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(len(_magic)) != _magic:
+                raise ValueError('{} is not a record index'.format(path))
+            length, = _header_length.unpack(f.read(_header_length.size))
+            header = json.loads(f.read(length).decode('utf-8'))
+            offsets = array('Q')
+            offsets.frombytes(f.read(offsets.itemsize * 2 * header['count']))
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            keys = json.loads(f.read().decode('utf-8'))
+        return cls(header['record_type'], offsets, keys,
+                   header['size'], header['mtime_ns'])
+
+    def save(self, path):
+        header = json.dumps({
+            'record_type': self.record_type,
+            'count': len(self),
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+        }).encode('utf-8')
+        offsets = array('Q', self.offsets)
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        with open(path, 'wb') as f:
+            f.write(_magic)
+            f.write(_header_length.pack(len(header)))
+            f.write(header)
+            f.write(offsets.tobytes())
+            f.write(json.dumps(self.keys).encode('utf-8'))
+
+    @classmethod
+    def for_file(cls, record_type, path, index_path=None):
+        """
+        Returns the index of the file at path, loading it from the sidecar
+        file if it is up to date and building and saving it otherwise. The
+        index is kept and returned again by later calls for as long as the
+        file doesn't change, so the sidecar file is only read once.
+        """
+        if index_path is None:
+            index_path = path + '.idx'
+        key = os.path.abspath(index_path)
+        index = _loaded.get(key)
+        if index is not None and index.is_current(record_type, path):
+            return index
+        try:
+            index = cls.load(index_path)
+        except (OSError, ValueError):
+            index = None
+        if index is None or not index.is_current(record_type, path):
+            index = cls.build(record_type, path)
+            index.save(index_path)
+        _loaded.pop(key, None)
+        if len(_loaded) >= _max_loaded:
+            # drop the index that was loaded first
+            del _loaded[next(iter(_loaded))]
+        _loaded[key] = index
+        return index
+
+    def is_current(self, record_type, path):
+        """
+        Returns True if the index was built for the record type from the file
+        at path as it currently is.
+        """
+        stat = os.stat(path)
+        return (self.record_type == record_type.__name__ and
+                self.size == stat.st_size and
+                self.mtime_ns == stat.st_mtime_ns)
+
+    def __len__(self):
+        return len(self.offsets) // 2
+
+    def span(self, position):
+        """Returns the (start, end) byte offsets of the record at position."""
+        if not -len(self) <= position < len(self):
+            raise IndexError('record position out of range')
+        position %= len(self)
+        return (self.offsets[2 * position], self.offsets[2 * position + 1])
+
+    def position(self, key):
+        """Returns the position of the record with the given key."""
+        return self.keys[key]
@@ -0,0 +1,86 @@
+"""
+Limits on the size of the records being parsed, so that malformed data (eg, a
+RIS file missing an 'ER  - ' line or a Medline file without blank lines) is
+rejected before a single record can take up an unbounded amount of memory.
+"""
+import functools
+
+
+class SizeLimits:
+    """
+    Maximum sizes of a record, of a field (including its continuation lines)
+    and of the continuation lines of a field. Sizes are counted in bytes of
+    the data read from paths and binary files, line endings included, and in
+    characters of the data passed as text. A limit of None is no limit.
+    """
+    def __init__(self, record=None, field=None, continuation=None):
+        self.record = record
+        self.field = field
+        self.continuation = continuation
+
+    def tracker(self):
+        return SizeTracker(self)
+
+    def read_lines(self, lines):
+        """
+        Returns an iterable of the lines of text in lines, which is either a
+        text file object or any other iterable of lines. Lines are read from
+        a file no further than just past the record limit, so a line too
+        long for any record is read in pieces, the first of which exceeds the
+        limit, rather than all at once.
+        """
+        if self.record is None or not hasattr(lines, 'readline'):
+            return lines
+        return iter(functools.partial(lines.readline, self.record + 1), '')
+
+    def check_lines(self, lines, is_continuation):
+        """
+        Returns the reason the record made of lines exceeds a limit or None
+        if it doesn't. is_continuation tells if a line continues the previous
+        field, as described in SizeTracker.add().
+        """
+        tracker = self.tracker()
+        for line in lines:
+            reason = tracker.add(line, is_continuation(line))
+            if reason is not None:
+                return reason
+
+
+class SizeTracker:
+    """Adds up the size of a record as its lines are read, checking it
+    against a set of SizeLimits."""
+    def __init__(self, limits):
+        self.limits = limits
+        self.reset()
+
+    def reset(self):
+        """Starts a new record."""
+        self.record = self.field = self.continuation = 0
+
+    def add(self, line, continuation=None):
+        """
+        Adds a line to the current record and returns the reason a limit is
+        exceeded or None if none is. The line starts a new field if
+        continuation is False or continues the previous one if it's True.
+        Fields are left unchecked if it's None, for formats whose fields
+        aren't made of lines.
+        """
+        limits = self.limits
+        size = len(line)
+        self.record += size
+        if limits.record is not None and self.record > limits.record:
+            return 'record larger than {}'.format(limits.record)
+        if continuation is None:
+            return None
+        if continuation:
+            self.field += size
+            self.continuation += size
+        else:
+            self.field = size
+            self.continuation = 0
+        if limits.field is not None and self.field > limits.field:
+            return 'field larger than {}'.format(limits.field)
+        if limits.continuation is not None and \
+                self.continuation > limits.continuation:
+            return 'continuation lines larger than {}'.format(
+                limits.continuation)
@@ -0,0 +1,34 @@
+"""
+Matching of duplicate records between two lists of records by their
+fingerprints.
+"""
+
+
+def all_matches(list1, list2):
+    """
+    Returns a generator of (record, match) tuples pairing the records of list2
+    with their duplicates in list1, found by location fingerprint or failing
+    that by title and authors fingerprint. Each record of list1 is matched at
+    most once.
+    """
+    list1_location_idx = {}
+    list1_title_authors_idx = {}
+    for record in list1:
+        if record.location_fingerprint:
+            list1_location_idx[record.location_fingerprint] = record
+        if record.title_authors_fingerprint:
+            list1_title_authors_idx[record.title_authors_fingerprint] = record
+
+    for record in list2:
+        match = None
+        if record.location_fingerprint:
+            match = list1_location_idx.get(record.location_fingerprint)
+
+        if not match and record.title_authors_fingerprint:
+            match = list1_title_authors_idx.get(
+                record.title_authors_fingerprint)
+
+        if match:
+            list1_location_idx.pop(match.location_fingerprint, None)
+            list1_title_authors_idx.pop(match.title_authors_fingerprint, None)
+            yield (record, match)
@@ -1,3 +1,138 @@
+import collections
+import itertools
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from ..exceptions import UnknownReferenceFormat
-from .ris import RISRecord
-from .medline import MedlineRecord
+from ..sources import open_binary, open_raw_lines
+from .ris import RISRecord, CompactRISRecord
+from .medline import MedlineRecord, CompactMedlineRecord
+from .pubmed_xml import PubmedXMLRecord
+from .endnote_xml import EndNoteXMLRecord
+from .bibtex import BibTeXRecord
+from .incremental import IncrementalParser
+
+# a line starting with a tag of up to four characters, padded with spaces to
+# four characters, followed by '- '
+_tag_line = re.compile(r'^[A-Z][A-Z0-9]{1,3} *(?<=^.{4})- ', re.M)
+# the start of the data of the formats that aren't made of tagged lines
+_format_starts = (
+    (re.compile(r'<PubmedArticleSet[\s>]'), PubmedXMLRecord),
+    (re.compile(r'<xml>\s*<records>'), EndNoteXMLRecord),
+    (re.compile(r'^@\s*[A-Za-z]+\s*[{(]', re.M), BibTeXRecord),
+)
+
+
+def detect_format(sample):
+    """
+    Returns the record type of the references in sample, the text (or bytes)
+    at the beginning of a file, based on whichever comes first of its first
+    tagged line, the root element of a PubMed or EndNote XML file or the
+    start of a BibTeX entry. RIS records must start with a 'TY  - ' line
+    while Medline records usually start with a 'PMID- ' line. Raises
+    UnknownReferenceFormat if none of them are found.
+    """
+    if isinstance(sample, bytes):
+        sample = sample.decode('utf-8', 'replace')
+    sample = sample.lstrip('\ufeff')
+    match = _tag_line.search(sample)
+    if match is None:
+        found, record_type = len(sample), None
+    elif match.group().startswith(('TY  - ', 'ER  - ')):
+        found, record_type = match.start(), RISRecord
+    else:
+        found, record_type = match.start(), MedlineRecord
+    for pattern, format_type in _format_starts:
+        match = pattern.search(sample, 0, found)
+        if match is not None:
+            found, record_type = match.start(), format_type
+    if record_type is None:
+        raise UnknownReferenceFormat
+    return record_type
+
+
+def parse_any(data, sample_size=4096, errors=None, fields=None,
+              limits=None, stats=None, encoding='utf-8',
+              encoding_errors='strict'):
+    """
+    Returns a generator of the records parsed from data, which can be any of
+    the sources accepted by the parse() methods, by the record type detected
+    from its first sample_size characters. The sampled lines are kept and
+    parsed so that data is only read once. Errors, fields, limits, stats,
+    encoding and encoding_errors are handled as by parse().
+    """
+    if fields is not None:
+        fields = frozenset(fields)
+    with open_raw_lines(data, encoding, encoding_errors) as (
+            lines, start, decode):
+        if limits is not None:
+            lines = limits.read_lines(lines)
+        lines = iter(lines)
+        head = []
+        length = 0
+        for line in lines:
+            head.append(line)
+            length += len(line)
+            if length >= sample_size:
+                break
+        record_type = detect_format(''.join(head))
+        records = record_type._parse_lines(itertools.chain(head, lines),
+                                           errors, fields, limits, decode,
+                                           start)
+        if stats is not None:
+            records = stats.observe(records)
+        yield from records
+
+
+def _parse_path(record_type, path):
+    """
+    Returns a list of the records parsed from the file at path by
+    record_type, or by the detected record type if it's None, with their
+    fields already extracted.
+    """
+    with open_binary(path) as f:
+        if record_type is None:
+            records = list(parse_any(f))
+        else:
+            records = list(record_type.parse(f))
+    for record in records:
+        record._raw_field_tokens
+    return records
+
+
+def parse_many(paths, workers=None, record_type=None):
+    """
+    Returns a generator of (path, record) tuples of the records parsed from
+    the files at paths, in the order of the paths. Each file is opened, read
+    and parsed by one of a pool of worker processes, or of threads when the
+    interpreter runs without the GIL, so only the paths are sent to the
+    workers. Each file's records are parsed by record_type or, if it's None,
+    by the record type detected from the file's content. The records of up
+    to twice as many files as workers are held in memory at once.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if getattr(sys, '_is_gil_enabled', lambda: True)():
+        parsers = ProcessPoolExecutor(workers)
+    else:
+        parsers = ThreadPoolExecutor(workers)
+    try:
+        paths = iter(paths)
+        pending = collections.deque()
+
+        def submit(path):
+            pending.append((path, parsers.submit(
+                _parse_path, record_type, path)))
+
+        for path in itertools.islice(paths, workers * 2):
+            submit(path)
+        while pending:
+            path, future = pending.popleft()
+            records = future.result()
+            for next_path in itertools.islice(paths, 1):
+                submit(next_path)
+            for record in records:
+                yield (path, record)
+    finally:
+        parsers.shutdown(cancel_futures=True)
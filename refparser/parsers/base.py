@@ -1,29 +1,356 @@
-from ..utils import cached_property
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import io
+import os
+import re
+from ..utils import cached_property, cached_slot, map_file, \
+    iter_chunks_async, data_start, close_map
+from ..index import RecordIndex
+from ..batch import RecordBatch
+from .incremental import IncrementalParser
+from ..sources import open_raw_lines, compression
+from ..exceptions import ReferenceSyntaxError, ReferenceSizeError
 from ..normalizers import normalize_page_range, \
     normalize_text_value, normalize_list_direction
 
 
+@functools.lru_cache(maxsize=256)
+def _field_pattern(field_line_format, field):
+    # starting with a newline rather than '^' lets the pattern be searched
+    # for much faster, but the data must then start with a newline too
+    return re.compile('\n' + field_line_format.format(re.escape(field)),
+                      re.M)
+
+
+def _syntax_error(errors, reason, line_number, offset,
+                  error_type=ReferenceSyntaxError):
+    """
+    Raises a ReferenceSyntaxError (or an error of error_type) or, when a list
+    of errors is passed, appends the error to it so that parsing can resume
+    at the next record.
+    """
+    error = error_type(reason, line_number, offset)
+    if errors is None:
+        raise error
+    errors.append(error)
+
+
 class BaseRecord:
     title = abstract = authors = journal_names = issn = volume = issue = \
         property(lambda self: None)
     pages = property(lambda self: (None, None))
+    # name of the format the record is parsed from (eg, 'RIS')
+    format_name = None
+    # fields holding a value that identifies the record within a file
+    key_fields = ()
+    # fields that the fingerprints are made from
+    fingerprint_fields = ()
+    # for formats made of tagged lines, a pattern matching a field at the
+    # start of a line whose groups are the field's name and the raw text of
+    # its value, and the pattern of the rest of the line, with '{}' in place
+    # of the group of the name
+    _field_line = _field_line_format = None
+    # the ParseStats object observing the record, if any
+    _stats = None
 
     def __init__(self, raw_data):
         self._raw_data = raw_data
 
+    @classmethod
+    def parse(cls, data, errors=None, fields=None, encoding='utf-8',
+              encoding_errors='strict', limits=None, stats=None):
+        """
+        Returns a generator of the records parsed from data, which is either
+        an iterable of lines of text (such as a text file), a binary file
+        object or a path. Files compressed with gzip, bzip2, xz or zip are
+        decompressed as they are read. Binary data is decoded one record at
+        a time, as described in sources.open_raw_lines(), so error offsets
+        are in bytes as they are for the other entry points.
+
+        Invalid data raises a ReferenceSyntaxError unless a list is passed as
+        errors, in which case the errors are appended to it and the invalid
+        records are skipped.
+
+        If fields, a collection of field names, is passed, the lines of all
+        other fields are dropped as they are read and the records only hold
+        the data of the requested fields.
+
+        If limits, a SizeLimits object, is passed, a record that grows larger
+        than the limits raises a ReferenceSizeError as soon as it does, or is
+        skipped if errors is a list. Lines are read no further than just past
+        the record limit.
+
+        If stats, a ParseStats object, is passed, the records are observed by
+        it as they are parsed.
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+        with open_raw_lines(data, encoding, encoding_errors) as (
+                lines, start, decode):
+            if limits is not None:
+                lines = limits.read_lines(lines)
+            records = cls._parse_lines(lines, errors, fields, limits, decode,
+                                       start)
+            if stats is not None:
+                records = stats.observe(records)
+            yield from records
+
+    @classmethod
+    def _parse_lines(cls, data, errors=None, fields=None, limits=None,
+                     decode=str, offset=0):
+        """Returns a generator of the records parsed from an iterable of lines
+        of text, the first of which is at offset. The raw data of a record is
+        the text of its lines passed to decode()."""
+        pass
+
+    @classmethod
+    def _exceeds_limits(cls, sizes, line, errors, line_number, record_line,
+                        record_offset):
+        """
+        Adds the line at line_number to the sizes tracked by a SizeTracker
+        for the record starting at record_line and record_offset. Returns
+        True, after raising or appending a ReferenceSizeError as
+        _syntax_error() does, if the record has grown larger than the limits.
+        """
+        if line_number == record_line:
+            sizes.reset()
+        reason = sizes.add(line, cls._is_continuation(line))
+        if reason is None:
+            return False
+        _syntax_error(errors, reason, record_line, record_offset,
+                      ReferenceSizeError)
+        return True
+
+    @staticmethod
+    def _is_continuation(line):
+        """Returns True if the line continues the field of the line before
+        it, False if it starts a field or None if fields aren't made of
+        lines."""
+        return None
+
+    @classmethod
+    def from_buffer(cls, buffer, start, end):
+        """
+        Returns a record backed by the bytes buffer[start:end]. Only the
+        offsets are kept until the record's data is first accessed, at which
+        point the bytes are decoded.
+        """
+        record = cls.__new__(cls)
+        record._buffer = buffer
+        record._span = (start, end)
+        return record
+
+    @classmethod
+    def _projected(cls, raw_data, fields):
+        """Returns a record of the text raw_data that holds only the fields
+        in the frozenset fields, as parse() would make it, or all of them if
+        fields is None."""
+        if fields is None:
+            return cls(raw_data)
+        lines = io.StringIO(raw_data, newline='\n')
+        record, = cls._parse_lines(lines, fields=fields)
+        return record
+
+    @cached_property
+    def _raw_data(self):
+        start, end = self._span
+        return self._buffer[start:end].decode('utf-8')
+
+    @classmethod
+    def split_buffer(cls, buffer, start=0, end=None, final=True,
+                     errors=None):
+        """Returns a generator of (start, end) offsets of each record within
+        the bytes buffer. Unless final is True, a record that may continue
+        past the end of the buffer is left out."""
+        raise NotImplementedError(
+            '{} records can only be parsed from lines of text'.format(
+                cls.format_name))
+
+    @classmethod
+    def _may_end_record(cls, buffer, pos, state):
+        """
+        Returns False if the data from pos to the end of the bytes buffer
+        can't complete a record, or hold a syntax error, that split_buffer()
+        didn't find in buffer[:pos], so the buffer needn't be split again.
+        State is a dict that is passed to every call until the buffer is
+        split again, for keeping track of what was already read.
+        """
+        return True
+
+    @classmethod
+    def parse_file(cls, path, errors=None, fields=None, stats=None):
+        """
+        Memory-maps the file at path and returns a generator of records that
+        are decoded lazily from the map. The map stays open for as long as
+        any of the records refers to it. Compressed files are parsed as they
+        are decompressed instead. Errors, fields and stats are handled as by
+        parse(), except that records are decoded as soon as they're found
+        when fields is passed.
+        """
+        if stats is not None:
+            yield from stats.observe(cls.parse_file(path, errors, fields))
+            return
+        with open(path, 'rb') as f:
+            compressed = compression(f)
+        if compressed:
+            # compressed data can't be mapped, parse it as it's decompressed
+            yield from cls.parse(path, errors, fields)
+            return
+        if fields is not None:
+            fields = frozenset(fields)
+        buffer = map_file(path)
+        for start, end in cls.split_buffer(buffer, data_start(buffer),
+                                           errors=errors):
+            if fields is None:
+                yield cls.from_buffer(buffer, start, end)
+            else:
+                yield cls._projected(buffer[start:end].decode('utf-8'),
+                                     fields)
+
+    @classmethod
+    async def aparse(cls, stream, encoding='utf-8', encoding_errors='strict',
+                     limits=None, fields=None):
+        """
+        Returns an async generator of the records read from an async stream
+        of bytes, such as an asyncio.StreamReader or an async iterable of
+        chunks. Each record is yielded as soon as it is complete and only the
+        data of the incomplete record that follows it is kept, up to the
+        limits of a SizeLimits object if one is passed. Fields is handled as
+        by parse().
+        """
+        parser = IncrementalParser(cls, encoding, encoding_errors, limits,
+                                   fields)
+        async for chunk in iter_chunks_async(stream):
+            for record in parser.feed(chunk):
+                yield record
+        for record in parser.close():
+            yield record
+
+    @classmethod
+    def parse_batches(cls, data, batch_size=10000):
+        """
+        Returns a generator of RecordBatch objects holding the properties of
+        up to batch_size consecutive records parsed from data. Records are
+        discarded as soon as their properties are added to a batch and only
+        the fields needed for the batch's columns are read.
+        """
+        batch = RecordBatch()
+        for record in cls.parse(data, fields=cls.fingerprint_fields):
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch
+                batch = RecordBatch()
+        if batch:
+            yield batch
+
+    @classmethod
+    def next_boundary(cls, buffer, pos):
+        """Returns the offset of the first record boundary at or after pos
+        within the bytes buffer."""
+        raise NotImplementedError(
+            '{} records can only be parsed from lines of text'.format(
+                cls.format_name))
+
+    @classmethod
+    def parse_parallel(cls, path, workers=None, fields=None):
+        """
+        Splits the file at path into byte ranges aligned to record boundaries
+        and parses them in a pool of worker processes. Returns a generator of
+        the records in the order they appear in the file. Fields is handled
+        as by parse().
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        buffer = map_file(path)
+        try:
+            start = data_start(buffer)
+            chunks = workers * 4
+            boundaries = {start, len(buffer)}
+            for i in range(1, chunks):
+                pos = max(len(buffer) * i // chunks, start)
+                boundaries.add(cls.next_boundary(buffer, pos))
+        finally:
+            close_map(buffer)
+        boundaries = sorted(boundaries)
+        count = len(boundaries) - 1
+        with ProcessPoolExecutor(workers) as executor:
+            for records in executor.map(_parse_chunk, [cls] * count,
+                                        [path] * count, boundaries[:-1],
+                                        boundaries[1:], [fields] * count):
+                yield from records
+
+    @classmethod
+    def fetch(cls, path, position=None, key=None, index=None):
+        """
+        Reads a single record from the file at path, either the one at
+        position or the one whose key field has the value key, by seeking
+        straight to it. Uses the sidecar index of the file unless an index is
+        passed, building the sidecar if it is missing or out of date. The
+        sidecar is loaded by RecordIndex.for_file(), which keeps it for the
+        calls that follow as long as the file doesn't change.
+        """
+        if (position is None) == (key is None):
+            raise ValueError('fetch() takes either a position or a key')
+        if index is None:
+            index = RecordIndex.for_file(cls, path)
+        if key is not None:
+            position = index.position(key)
+        start, end = index.span(position)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return cls(f.read(end - start).decode('utf-8'))
+
+    @cached_property
+    def _raw_field_tokens(self):
+        """
+        Maps the name of each raw field to a list of the tokens of its
+        values, which _field_value() turns into the values. The tokens of
+        the formats made of tagged lines are the raw text of the values,
+        found by a single pass of _field_line over the raw data.
+        """
+        tokens = {}
+        for field, token in self._field_line.findall(self._raw_data):
+            if field not in tokens:
+                tokens[field] = []
+            tokens[field].append(token)
+        return tokens
+
+    def _field_value(self, token):
+        """Returns the value of a raw field from its token."""
+        return token
+
     def raw_fields(self):
         """Returns a generator of tuples containing each raw fields name and
         value."""
-        pass
+        for field, token in self._field_line.findall(self._raw_data):
+            yield (field, self._field_value(token))
+
+    def _raw_values(self, field):
+        """
+        Returns the list of values of a raw field that the record has, or
+        None if it has none. The values are built from their tokens every
+        time they're asked for, since the properties that read them are
+        cached themselves.
+        """
+        tokens = self._raw_field_tokens.get(field)
+        if tokens is not None:
+            return [self._field_value(token) for token in tokens]
+
+    def _find_raw_values(self, field):
+        """Returns the list of values of a raw field that the record has, or
+        None if it has none, found by a pass over the raw data that only
+        matches the field's lines, without tokenizing the other fields."""
+        tokens = _field_pattern(self._field_line_format, field).findall(
+            '\n' + self._raw_data)
+        if tokens:
+            return [self._field_value(token) for token in tokens]
 
     @cached_property
     def _raw_fields_aggregate(self):
-        aggregate = {}
-        for field, value in self.raw_fields():
-            if field not in aggregate:
-                aggregate[field] = []
-            aggregate[field].append(value)
-        return aggregate
+        return {field: self._raw_values(field)
+                for field in self._raw_field_tokens}
 
     def _first_raw_aggregate(self, *fields):
         """
@@ -31,8 +358,9 @@ class BaseRecord:
         one of the field names passed or None if there was no match.
         """
         for field in fields:
-            if field in self._raw_fields_aggregate:
-                return self._raw_fields_aggregate[field]
+            values = self._raw_values(field)
+            if values is not None:
+                return values
 
     def _first_raw_value(self, *fields):
         """
@@ -51,8 +379,7 @@ class BaseRecord:
         """
         values = []
         for field in fields:
-            if field in self._raw_fields_aggregate:
-                values += self._raw_fields_aggregate[field]
+            values += self._raw_values(field) or ()
         if values:
             return values
 
@@ -76,18 +403,29 @@ class BaseRecord:
 
         return [guess_lastname(author) for author in self.authors]
 
+    def _timed(self, stage, func, *args):
+        """Returns func(*args), adding the time it takes to the timing of
+        stage if the record is observed by a ParseStats object."""
+        if self._stats is None:
+            return func(*args)
+        return self._stats.time(stage, func, *args)
+
     @cached_property
     def location_fingerprint(self):
         """
         Returns a fingerprint of the record containing the journals ISSN,
         volume, issue and pages. Returns None if any of this data is missing.
         """
+        return self._timed('fingerprinting', self._location_fingerprint)
+
+    def _location_fingerprint(self):
         if None in (self.pages[0], self.volume, self.issn):
             return None
         issue = self.issue if self.issue is not None else ''
 
         return '$'.join((
-                (normalize_page_range(*self.pages)),
+                self._timed('normalization', normalize_page_range,
+                            *self.pages),
                 self.volume,
                 issue,
                 self.issn,))
@@ -99,13 +437,78 @@ class BaseRecord:
         authors lastnames. Authors lastnames are listed alphabetically to
         keep them canonical as some records list the authors in reverse order.
         """
+        return self._timed('fingerprinting', self._title_authors_fingerprint)
+
+    def _title_authors_fingerprint(self):
         if None in (self.title, self.authors_lastnames):
             return None
+        return '$'.join(self._timed('normalization',
+                                    self._normalized_title_authors))
 
+    def _normalized_title_authors(self):
         lastnames = list(map(normalize_text_value, self.authors_lastnames))
         lastnames = normalize_list_direction(lastnames)
         lastnames = '.'.join(lastnames)
 
         title = normalize_text_value(self.title)
 
-        return '$'.join((lastnames, title))
+        return (lastnames, title)
+
+
+def compact_record_type(record_type):
+    """
+    Returns a variant of the record type whose instances keep their data and
+    computed properties in __slots__ rather than a __dict__. The variant has
+    the same methods and properties as the record type but isn't a subclass
+    of it.
+
+    For formats made of tagged lines, the variant's properties find the
+    values of their fields in the raw data rather than in the tokens of all
+    the fields, which take more memory than the raw data and aren't kept
+    unless _raw_field_tokens is read. Properties are slower to compute the
+    first time, but a record holding its computed fingerprints takes about
+    half the memory of a regular one.
+    """
+    namespace = {}
+    for klass in reversed(record_type.__mro__[:-1]):
+        namespace.update(vars(klass))
+    del namespace['__dict__'], namespace['__weakref__']
+
+    slots = ['_buffer', '_span']
+    for name, value in list(namespace.items()):
+        if isinstance(value, cached_property):
+            namespace[name] = cached_slot(value.func)
+            slots.append(cached_slot.slot_name(name))
+    # attributes that are set on some records only keep their class
+    # attribute as the default
+    for name in ('_stats',):
+        namespace[name] = cached_slot(
+            lambda record, default=namespace[name]: default)
+        slots.append(cached_slot.slot_name(name))
+    namespace['__slots__'] = tuple(slots)
+    if record_type._field_line_format is not None:
+        namespace['_raw_values'] = namespace['_find_raw_values']
+
+    name = 'Compact' + record_type.__name__
+    namespace['__qualname__'] = name
+    return type(name, (), namespace)
+
+
+def _parse_chunk(record_type, path, start, end, fields=None):
+    """
+    Parses the records between the start and end byte offsets of the file at
+    path, holding only the fields in fields if it isn't None, and returns
+    them with their fields already extracted.
+    """
+    buffer = map_file(path)
+    records = []
+    try:
+        for record_start, record_end in record_type.split_buffer(
+                buffer, start, end):
+            record = record_type._projected(
+                buffer[record_start:record_end].decode('utf-8'), fields)
+            record._raw_field_tokens
+            records.append(record)
+    finally:
+        close_map(buffer)
+    return records
@@ -0,0 +1,371 @@
+import re
+import unicodedata
+from ..utils import cached_property, find_line_start, LineCounter
+from .base import BaseRecord, _syntax_error
+
+_unclosed = 'entry opened without being closed'
+
+# the start of an entry, eg '@article{'
+_entry_start = re.compile(r'\s*@\s*([A-Za-z]+)\s*([{(])')
+# entries that don't hold references
+_non_entries = ('comment', 'preamble', 'string')
+_closing_delimiters = {'{': '}', '(': ')'}
+# the start of an entry at the start of a line within a bytes buffer
+_buffer_entry_start = re.compile(
+    rb'^[^\S\n]*(@)[^\S\n]*([A-Za-z]+)[^\S\n]*([{(])', re.M)
+
+# the name of a field up to the start of its value
+_field_name = re.compile(r'[\s,]*([^\s=,{}()"#]+)\s*=\s*')
+# a value made of a single word, eg a number or the name of a @string macro
+_bare_value = re.compile(r'[^\s,#{}()"]+')
+_braces = re.compile(r'[{}]')
+_quote_or_braces = re.compile(r'["{}]')
+_whitespace = re.compile(r'\s+')
+_optional_whitespace = re.compile(r'\s*')
+# the citation key following the start of an entry
+_key = re.compile(r'\s*([^\s,]*)\s*,?')
+
+# LaTeX accent commands and the combining characters they stand for
+_accents = {'`': '\u0300', "'": '\u0301', '^': '\u0302', '~': '\u0303',
+            '=': '\u0304', '.': '\u0307', '"': '\u0308'}
+_accented = re.compile(r'\\([`\'^~=."])\s*{?\s*\\?([A-Za-z])}?')
+_dotless_i = re.compile(r'\\i\b')
+
+
+def _balanced_end(text, pos, pattern):
+    """
+    Returns the offset just past the brace or quote that closes the value
+    opened at pos, or -1 if it isn't closed. Braces nested within the value
+    are skipped.
+    """
+    depth = 0
+    for match in pattern.finditer(text, pos + 1):
+        char = match.group()
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0:
+                return match.end() if text[pos] == '{' else -1
+            depth -= 1
+        elif depth == 0:
+            return match.end()
+    return -1
+
+
+def _value_parts(text, pos):
+    """
+    Returns a list of the (start, end) offsets of the parts of the value at
+    pos, which are concatenated with '#'. A part is a braced or quoted string
+    or a single word.
+    """
+    parts = []
+    while pos < len(text):
+        if text[pos] == '{':
+            end = _balanced_end(text, pos, _braces)
+        elif text[pos] == '"':
+            end = _balanced_end(text, pos, _quote_or_braces)
+        else:
+            match = _bare_value.match(text, pos)
+            end = match.end() if match else -1
+        if end == -1:
+            break
+        parts.append((pos, end))
+        pos = _optional_whitespace.match(text, end).end()
+        if text[pos:pos + 1] != '#':
+            break
+        pos = _optional_whitespace.match(text, pos + 1).end()
+    return parts
+
+
+def _entry_end(buffer, pos, end, opening):
+    """
+    Returns the offset past the line that closes the entry starting at pos
+    within the bytes buffer, and whether the entry is closed. Like the lines
+    of an entry, the delimiters are counted a line at a time. If the entry
+    isn't closed, the offset is that of the next line starting with '@',
+    which can't be within an entry, or end.
+    """
+    closing = _closing_delimiters[opening.decode('ascii')].encode('ascii')
+    depth = 0
+    line_start = pos
+    while line_start < end:
+        if line_start != pos and buffer[line_start:line_start + 1] == b'@':
+            return line_start, False
+        line_end = buffer.find(b'\n', line_start, end) + 1 or end
+        line = buffer[line_start:line_end]
+        depth += line.count(opening) - line.count(closing)
+        if depth <= 0:
+            return line_end, True
+        line_start = line_end
+    return end, False
+
+
+class _DelimiterCounter:
+    """
+    Counts the delimiters of the entries within a bytes buffer a line at a
+    time, as the line parser does, resuming at the line where the last call
+    stopped as the buffer grows.
+    """
+    def __init__(self):
+        self.line_start = 0
+        # depth of the delimiters of the current entry, or None outside one
+        self.depth = None
+
+    def ends_entry(self, buffer, pos):
+        """Returns True if one of the complete lines that end after pos
+        closes an entry or starts one within another."""
+        while True:
+            line_end = buffer.find(b'\n', self.line_start) + 1
+            if not line_end:
+                return False
+            if self._read_line(buffer, line_end) and line_end > pos:
+                return True
+            self.line_start = line_end
+
+    def _read_line(self, buffer, line_end):
+        """Counts the delimiters of the line ending at line_end and returns
+        True if it ends an entry."""
+        ended = False
+        if self.depth is not None and \
+                buffer[self.line_start:self.line_start + 1] == b'@':
+            # an entry can't start within another, this one was unclosed
+            self.depth = None
+            ended = True
+        line_start = self.line_start
+        if self.depth is None:
+            match = _buffer_entry_start.match(buffer, line_start, line_end)
+            if match is None:
+                return ended
+            line_start = match.start(1)
+            self.opening = match.group(3)
+            self.closing = _closing_delimiters[
+                self.opening.decode('ascii')].encode('ascii')
+            self.depth = 0
+        line = buffer[line_start:line_end]
+        self.depth += line.count(self.opening) - line.count(self.closing)
+        if self.depth <= 0:
+            self.depth = None
+            return True
+        return ended
+
+
+def latex_to_text(value):
+    """Returns the value with LaTeX accents turned into accented characters
+    and grouping braces and runs of whitespace removed."""
+    if '\\' in value:
+        value = _accented.sub(
+            lambda match: match.group(2) + _accents[match.group(1)], value)
+        value = _dotless_i.sub('i', value)
+        value = unicodedata.normalize('NFC', value)
+    value = value.replace('{', '').replace('}', '')
+    return _whitespace.sub(' ', value).strip()
+
+
+class BibTeXRecord(BaseRecord):
+    """
+    An entry of a BibTeX file. Fields are named after the entry's field names
+    in lowercase, while the ENTRYTYPE and ID fields hold the entry type (eg,
+    article) and the citation key. @string macros aren't expanded, fields
+    that use one hold the macro's name.
+    """
+    format_name = 'BibTeX'
+    key_fields = ('ID',)
+    fingerprint_fields = ('title', 'author', 'issn', 'volume', 'number',
+                          'issue', 'pages')
+
+    @classmethod
+    def _parse_lines(cls, data, errors=None, fields=None, limits=None,
+                     decode=str, offset=0):
+        record = None
+        record_line = record_offset = None
+        sizes = None if limits is None else limits.tracker()
+
+        for line_number, line in enumerate(data, 1):
+            if record is not None and line.startswith('@'):
+                # an entry can't start within another, this one was unclosed
+                _syntax_error(errors, _unclosed, record_line, record_offset)
+                record = None
+            entry_line = line
+            if record is None:
+                match = _entry_start.match(line)
+                if match:
+                    entry_line = line[line.index('@'):]
+                    record = [entry_line]
+                    record_line, record_offset = line_number, offset
+                    opening = match.group(2)
+                    closing = _closing_delimiters[opening]
+                    skip = match.group(1).lower() in _non_entries
+                    depth = 0
+            else:
+                record.append(line)
+            if record is not None:
+                depth += (entry_line.count(opening) -
+                          entry_line.count(closing))
+                if depth <= 0:
+                    if not skip:
+                        yield cls._make_record(decode(''.join(record)),
+                                               fields)
+                    record = None
+                elif sizes is not None and cls._exceeds_limits(
+                        sizes, entry_line, errors, line_number, record_line,
+                        record_offset):
+                    record = None
+            offset += len(line)
+
+        if record is not None:
+            _syntax_error(errors, _unclosed, record_line, record_offset)
+
+    @classmethod
+    def split_buffer(cls, buffer, start=0, end=None, final=True,
+                     errors=None):
+        """Returns a generator of (start, end) offsets of each entry within
+        the bytes buffer, leaving out @comment, @preamble and @string
+        entries. Unless final is True, an entry that may continue past the
+        end of the buffer is left out."""
+        if end is None:
+            end = len(buffer)
+        # lines are only counted to report errors
+        line_at = LineCounter(buffer)
+        pos = start
+        while True:
+            match = _buffer_entry_start.search(buffer, pos, end)
+            if match is None:
+                return
+            entry_end, closed = _entry_end(buffer, match.start(1), end,
+                                           match.group(3))
+            if closed and not final and buffer[entry_end - 1:entry_end] != \
+                    b'\n':
+                # the last line of the entry may not be complete yet
+                return
+            if not closed:
+                if entry_end == end and not final:
+                    return
+                _syntax_error(errors, _unclosed, line_at(match.start()),
+                              match.start())
+            elif match.group(2).decode('ascii').lower() not in _non_entries:
+                yield (match.start(1), entry_end)
+            pos = entry_end
+
+    @classmethod
+    def _may_end_record(cls, buffer, pos, state):
+        # the delimiters are counted as far as the last complete line, and
+        # the count resumes there on the next call
+        if 'counter' not in state:
+            state['counter'] = _DelimiterCounter()
+        return state['counter'].ends_entry(buffer, pos)
+
+    @classmethod
+    def next_boundary(cls, buffer, pos):
+        """Returns the offset of the first record boundary at or after pos
+        within the bytes buffer, the start of a line starting with '@'."""
+        if pos > 0 and buffer[pos - 1:pos] != b'\n':
+            # move on to the start of the next line
+            pos = buffer.find(b'\n', pos) + 1 or len(buffer)
+        boundary = find_line_start(buffer, b'@', pos)
+        return boundary if boundary != -1 else len(buffer)
+
+    @classmethod
+    def _make_record(cls, raw_data, fields):
+        record = cls(raw_data)
+        if fields is not None:
+            record._raw_field_tokens = {
+                field: spans
+                for field, spans in record._raw_field_tokens.items()
+                if field in fields or field in ('ENTRYTYPE', 'ID')}
+        return record
+
+    @cached_property
+    def _raw_field_tokens(self):
+        """Maps the name of each raw field to a list of the (start, end)
+        offsets of its values within the raw data."""
+        text = self._raw_data
+        match = _entry_start.match(text)
+        if match is None:
+            return {}
+        spans = {'ENTRYTYPE': [match.span(1)]}
+        key = _key.match(text, match.end())
+        if key.group(1):
+            spans['ID'] = [key.span(1)]
+        pos = key.end()
+        while True:
+            name = _field_name.match(text, pos)
+            if name is None:
+                break
+            parts = _value_parts(text, name.end())
+            if not parts:
+                break
+            field = name.group(1).lower()
+            if field not in spans:
+                spans[field] = []
+            spans[field].append((parts[0][0], parts[-1][1]))
+            pos = parts[-1][1]
+        return spans
+
+    def raw_fields(self):
+        spans = sorted((start, end, field)
+                       for field, field_spans in self._raw_field_tokens.items()
+                       for start, end in field_spans)
+        for start, end, field in spans:
+            yield (field, self._field_value((start, end)))
+
+    def _field_value(self, span):
+        """Returns the value of the raw field found between the (start, end)
+        offsets of the raw data, with its parts joined and LaTeX markup
+        removed."""
+        start, end = span
+        text = self._raw_data
+        if text[start] not in '{"' or '#' in text[start:end]:
+            parts = _value_parts(text[:end], start)
+        else:
+            parts = [(start, end)]
+        value = ''.join(
+            text[part_start + 1:part_end - 1]
+            if text[part_start] in '{"' else text[part_start:part_end]
+            for part_start, part_end in parts)
+        return latex_to_text(value)
+
+    @cached_property
+    def title(self):
+        return self._first_raw_value('title')
+
+    @cached_property
+    def abstract(self):
+        return self._first_raw_value('abstract')
+
+    @cached_property
+    def authors(self):
+        value = self._first_raw_value('author')
+        if value:
+            return re.split(r'\s+and\s+', value)
+
+    @cached_property
+    def journal_names(self):
+        # a record may include multiple names (eg, abbreviated & full)
+        value = self._all_raw_values('journal', 'journaltitle',
+                                     'shortjournal')
+        if value:
+            return set(value)
+
+    @cached_property
+    def issn(self):
+        value = self._first_raw_value('issn')
+        if value:
+            # several ISSNs may be listed, keep the first
+            value = re.split(r'[\s;,]', value, 1)[0]
+        return value
+
+    @cached_property
+    def volume(self):
+        return self._first_raw_value('volume')
+
+    @cached_property
+    def issue(self):
+        return self._first_raw_value('number', 'issue')
+
+    @cached_property
+    def pages(self):
+        pagination = self._first_raw_value('pages')
+        if pagination is None:
+            return (None, None)
+        start, _, end = pagination.partition('-')
+        return (start.strip(), end.lstrip('-').strip() or None)
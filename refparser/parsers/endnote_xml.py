@@ -0,0 +1,93 @@
+import re
+from ..utils import cached_property
+from .xml_base import XMLRecord, element_text
+
+# the EndNote elements read into fields, by their path within a record. Fields
+# are named after the last element of the path.
+_field_paths = (
+    'rec-number',
+    'titles/title',
+    'titles/secondary-title',
+    'periodical/full-title',
+    'periodical/abbr-1',
+    'pages',
+    'volume',
+    'number',
+    'isbn',
+    'abstract',
+    'electronic-resource-num',
+)
+
+
+class EndNoteXMLRecord(XMLRecord):
+    """
+    A record element of an EndNote XML export. Fields are named after the
+    EndNote elements that hold them (eg, title, author and secondary-title)
+    and the ref-type field holds the name of the reference type.
+    """
+    format_name = 'EndNote XML'
+    record_tag = 'record'
+    key_fields = ('rec-number',)
+    fingerprint_fields = ('title', 'author', 'isbn', 'volume', 'number',
+                          'pages')
+
+    @classmethod
+    def _element_fields(cls, element):
+        fields = {}
+        ref_type = element.find('ref-type')
+        if ref_type is not None and ref_type.get('name'):
+            fields['ref-type'] = [ref_type.get('name')]
+        authors = [element_text(author) for author in
+                   element.iterfind('contributors/authors/author')]
+        if authors:
+            fields['author'] = authors
+        for path in _field_paths:
+            value = element_text(element.find(path))
+            if value:
+                fields[path.rsplit('/', 1)[-1]] = [value]
+        return fields
+
+    @cached_property
+    def title(self):
+        return self._first_raw_value('title')
+
+    @cached_property
+    def abstract(self):
+        return self._first_raw_value('abstract')
+
+    @cached_property
+    def authors(self):
+        return self._first_raw_aggregate('author')
+
+    @cached_property
+    def journal_names(self):
+        # a record may include multiple names (eg, abbreviated & full)
+        value = self._all_raw_values('secondary-title', 'full-title',
+                                     'abbr-1')
+        if value:
+            return set(value)
+
+    @cached_property
+    def issn(self):
+        # EndNote keeps ISSNs in the isbn element, several of them separated
+        # by line breaks or semicolons
+        value = self._first_raw_value('isbn')
+        if value:
+            value = re.split(r'[\s;,]', value, 1)[0]
+        return value
+
+    @cached_property
+    def volume(self):
+        return self._first_raw_value('volume')
+
+    @cached_property
+    def issue(self):
+        return self._first_raw_value('number')
+
+    @cached_property
+    def pages(self):
+        pagination = self._first_raw_value('pages')
+        if pagination is None:
+            return (None, None)
+        start, _, end = pagination.partition('-')
+        return (start.strip(), end.lstrip('-').strip() or None)
@@ -0,0 +1,187 @@
+import codecs
+from ..exceptions import ReferenceSizeError
+from ..sources import is_ascii_compatible, is_utf8
+
+# bytes kept at the end of the buffer while a record that is too large is
+# dropped, more than enough for the start of any record boundary
+_kept_on_skipping = 64
+
+
+class IncrementalParser:
+    """
+    A push parser for records of a given type. Chunks of bytes of any size
+    are passed to feed(), which returns the records they complete, and the
+    end of the input is signalled with close(). Only the data following the
+    last complete record is kept in memory, but the line numbers and offsets
+    of errors are counted from the start of the input.
+
+    Each record is decoded in one go, handling invalid bytes according to
+    encoding_errors, and its CRLF line endings become LF. A UTF-8 byte order
+    mark at the start of the input is skipped.
+
+    Records are found by their tags in the undecoded bytes, so the encoding
+    must be ASCII compatible. Others, such as UTF-16, raise ValueError.
+
+    If limits, a SizeLimits object, is passed, ReferenceSizeError is raised
+    as soon as the buffered data of an incomplete record grows past the
+    record limit, or when a complete record exceeds any of the limits. The
+    record is dropped and parsing resumes at the next record.
+
+    If fields, a collection of field names, is passed, the records only hold
+    the data of the requested fields, as those of record_type.parse() do.
+    """
+    def __init__(self, record_type, encoding='utf-8',
+                 encoding_errors='strict', limits=None, fields=None):
+        if not is_ascii_compatible(encoding):
+            raise ValueError(
+                '{} is not an ASCII compatible encoding'.format(encoding))
+        self.record_type = record_type
+        self.encoding = encoding
+        self.encoding_errors = encoding_errors
+        self.limits = limits
+        self.fields = None if fields is None else frozenset(fields)
+        # offset within the input of the first byte that is still buffered
+        self.offset = 0
+        # number of the line within the input of that byte
+        self._line = 1
+        self._buffer = bytearray()
+        self._closed = False
+        # records completed before an error, returned by the next call
+        self._pending = []
+        # offset within the input of the last error raised
+        self._raised = -1
+        # length of the start of the buffer that was split without finding
+        # the end of another record
+        self._scanned = 0
+        # kept by the record type about the data after that
+        self._scan_state = {}
+        # set while the rest of a record that is too large is dropped, from
+        # the offset within the buffer where the next record is looked for
+        self._skip_from = None
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of bytes to the input and returns a list of the records
+        it completed. If the input is invalid, the records completed before
+        the error are kept for the next call to feed() or close() and parsing
+        resumes after the error.
+        """
+        if self._closed:
+            raise ValueError('feed() called after close()')
+        self._buffer += chunk
+        if self.offset == 0 and is_utf8(self.encoding):
+            if len(self._buffer) < len(codecs.BOM_UTF8) and \
+                    codecs.BOM_UTF8.startswith(self._buffer):
+                # wait for more data before deciding if this is a BOM
+                return []
+            if self._buffer.startswith(codecs.BOM_UTF8):
+                del self._buffer[:len(codecs.BOM_UTF8)]
+                self.offset = len(codecs.BOM_UTF8)
+        if self._skip_from is not None and not self._skip():
+            records, self._pending = self._pending, []
+            return records
+        records = self._records(final=False)
+        if self.limits is not None and self.limits.record is not None and \
+                len(self._buffer) > self.limits.record:
+            self._pending = records
+            error = ReferenceSizeError(
+                'record larger than {}'.format(self.limits.record),
+                self._line, self.offset)
+            self._skip_from = self.record_type.next_boundary(
+                self._buffer, 0) + 1
+            self._skip()
+            raise error
+        return records
+
+    def close(self):
+        """
+        Signals the end of the input and returns a list of the remaining
+        records. Raises ReferenceSyntaxError if the input is invalid, for
+        example if it ends with an unclosed RIS record.
+        """
+        self._closed = True
+        if self._skip_from is not None and not self._skip():
+            # the record that is too large runs to the end of the input
+            self._consume(len(self._buffer))
+        return self._records(final=True)
+
+    def _skip(self):
+        """
+        Drops the data of a record that is too large up to the next record
+        boundary and returns True once it's found. Until then only the end
+        of the buffer is kept, in case it holds the start of the boundary.
+        """
+        boundary = self.record_type.next_boundary(self._buffer,
+                                                  self._skip_from)
+        if boundary < len(self._buffer):
+            self._consume(boundary)
+            self._skip_from = None
+            return True
+        self._consume(max(len(self._buffer) - _kept_on_skipping, 0))
+        self._skip_from = 1
+        return False
+
+    def _consume(self, size):
+        """Drops the first size bytes of the buffer."""
+        self._line += self._buffer.count(b'\n', 0, size)
+        del self._buffer[:size]
+        self.offset += size
+        self._scanned = 0
+        self._scan_state = {}
+
+    def _records(self, final):
+        records, self._pending = self._pending, []
+        if not final and self._scanned and not \
+                self.record_type._may_end_record(self._buffer, self._scanned,
+                                                 self._scan_state):
+            # don't split the data of a large record again for every chunk
+            self._scanned = len(self._buffer)
+            return records
+        consumed = 0
+        errors = []
+        error = None
+        for start, end in self.record_type.split_buffer(
+                self._buffer, final=final, errors=errors):
+            error = self._new_error(errors)
+            if error is not None:
+                # leave the record after the error to the next call
+                break
+            text = self._buffer[start:end].decode(self.encoding,
+                                                  self.encoding_errors)
+            if '\r' in text:
+                text = text.replace('\r\n', '\n')
+            consumed = end
+            if self.limits is not None:
+                error = self._limit_error(text, start)
+                if error is not None:
+                    break
+            records.append(self.record_type._projected(text, self.fields))
+        else:
+            error = self._new_error(errors)
+        self._consume(consumed)
+        if error is not None:
+            self._pending = records
+            raise error
+        self._scanned = len(self._buffer)
+        return records
+
+    def _new_error(self, errors):
+        """Returns the first of the errors found in the buffer that hasn't
+        been raised yet, marking it as raised, or None. Its line number and
+        offset are made relative to the start of the input."""
+        for error in errors:
+            offset = self.offset + error.offset
+            if offset > self._raised:
+                self._raised = offset
+                line_number = error.line_number
+                if line_number is not None:
+                    line_number += self._line - 1
+                return type(error)(error.reason, line_number, offset)
+
+    def _limit_error(self, text, start):
+        reason = self.limits.check_lines(text.splitlines(True),
+                                         self.record_type._is_continuation)
+        if reason is not None:
+            return ReferenceSizeError(
+                reason, self._line + self._buffer.count(b'\n', 0, start),
+                self.offset + start)
@@ -1,43 +1,106 @@
 import re
 from ..utils import cached_property
-from .base import BaseRecord
+from .base import BaseRecord, compact_record_type
+
+# runs of lines that contain nothing but whitespace
+_blank_lines = re.compile(rb'(?:[ \t\r\f\v]*\n)*')
+# the end of a line followed by a blank line or the end of the buffer
+_record_separator = re.compile(rb'\n[ \t\r\f\v]*(?:\n|\Z)')
+# the end of a line followed by a blank line
+_blank_line = re.compile(rb'\n[ \t\r\f\v]*\n')
 
 
 class MedlineRecord(BaseRecord):
+    format_name = 'Medline'
+    key_fields = ('PMID',)
+    fingerprint_fields = ('TI', 'FAU', 'AU', 'IS', 'VI', 'IP', 'PG')
+    # a tag padded with spaces to four characters followed by '- ' and the
+    # value, which continues on the lines indented by six spaces
+    _field_line_format = r' *{} *(?<=^.{{4}})- (.*(?:\n      .*)*)'
+    _field_line = re.compile(
+        '^' + _field_line_format.format(r'(\S[^\n]*?)'), re.M)
+
     @classmethod
-    def parse(cls, data):
+    def _parse_lines(cls, data, errors=None, fields=None, limits=None,
+                     decode=str, offset=0):
+        in_record = False
+        in_field = True
+        # set while the rest of a record that is too large is skipped
+        skipping = False
         record = ''
-        for line in data:
+        sizes = None if limits is None else limits.tracker()
+        for line_number, line in enumerate(data, 1):
             if line.strip() == '':
                 # records are seperated by empty lines
-                if record != '':
-                    yield cls(record)
+                if in_record:
+                    yield cls(decode(record))
+                    in_record = False
                     record = ''
-            else:
-                record += line
-        if record != '':
-            yield cls(record)
-
-    def raw_fields(self):
-        """Returns a generator of tuples containing each raw fields name and
-        value."""
-        current_field = ''
-        current_value = ''
-        for line in self._raw_data.splitlines():
-            if line.startswith('      '):
-                current_value += '\n' + line[6:]
-            else:
-                try:
-                    field, value = line.split('- ', 1)
-                    if len(field) == 4:
-                        if current_field:
-                            yield(current_field, current_value.strip())
-                        current_field = field.strip()
-                        current_value = value
-                except ValueError:
-                    pass
-        if current_field:
-            yield(current_field, current_value.strip())
+                skipping = False
+            elif not skipping:
+                if not in_record:
+                    in_record = True
+                    record_line, record_offset = line_number, offset
+                if fields is not None and not line.startswith('      '):
+                    # continuation lines belong to the preceding field
+                    in_field = line[:4].strip() in fields
+                if in_field:
+                    record += line
+                if sizes is not None and cls._exceeds_limits(
+                        sizes, line, errors, line_number, record_line,
+                        record_offset):
+                    in_record = False
+                    record = ''
+                    skipping = True
+            offset += len(line)
+        if in_record:
+            yield cls(decode(record))
+
+    @staticmethod
+    def _is_continuation(line):
+        return line.startswith('      ')
+
+    @classmethod
+    def split_buffer(cls, buffer, start=0, end=None, final=True,
+                     errors=None):
+        """Returns a generator of (start, end) offsets of each record within
+        the bytes buffer. Unless final is True, a record that may continue
+        past the end of the buffer is left out."""
+        if end is None:
+            end = len(buffer)
+        record_separator = _record_separator if final else _blank_line
+        pos = _blank_lines.match(buffer, start, end).end()
+        while pos < end:
+            separator = record_separator.search(buffer, pos, end)
+            if separator is None:
+                if not final:
+                    return
+                if buffer[pos:end].strip():
+                    yield (pos, end)
+                return
+            yield (pos, separator.start() + 1)
+            pos = _blank_lines.match(buffer, separator.end(), end).end()
+
+    @classmethod
+    def _may_end_record(cls, buffer, pos, state):
+        # until the end of the data, a record ends at a blank line
+        line_start = buffer.rfind(b'\n', 0, pos) + 1
+        return _blank_line.search(buffer, max(line_start - 1, 0)) is not None
+
+    @classmethod
+    def next_boundary(cls, buffer, pos):
+        """Returns the offset of the first record boundary at or after pos
+        within the bytes buffer."""
+        if pos == 0:
+            return 0
+        separator = _record_separator.search(buffer, pos - 1)
+        return separator.end() if separator else len(buffer)
+
+    def _field_value(self, token):
+        if '\n' in token:
+            # continuation lines are joined without their indentation
+            token = token.replace('\n      ', '\n')
+        return token.strip()
 
     @cached_property
     def title(self):
@@ -77,7 +140,10 @@ class MedlineRecord(BaseRecord):
 
     @cached_property
     def pages(self):
-        pagination = self._first_raw_value('PG').strip()
+        pagination = self._first_raw_value('PG')
+        if pagination is None:
+            return (None, None)
+        pagination = pagination.strip()
 
         # remove extra comments that can appear after space, comma or semicolon
         pagination = re.sub('[ ,;].*$', '', pagination)
@@ -88,3 +154,6 @@ class MedlineRecord(BaseRecord):
             start, end = (pagination, None)
 
         return (start, end)
+
+
+CompactMedlineRecord = compact_record_type(MedlineRecord)
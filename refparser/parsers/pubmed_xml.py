@@ -0,0 +1,108 @@
+from xml.etree import ElementTree
+from .medline import MedlineRecord
+from .xml_base import XMLRecord, element_text
+
+
+def _author_fields(author_list):
+    # the tags Medline uses for full names, short names and group authors
+    fields = {'FAU': [], 'AU': [], 'CN': []}
+    for author in author_list.iterfind('Author'):
+        collective_name = element_text(author.find('CollectiveName'))
+        last_name = element_text(author.find('LastName'))
+        if collective_name:
+            fields['CN'].append(collective_name)
+        elif last_name:
+            fore_name = element_text(author.find('ForeName'))
+            initials = element_text(author.find('Initials'))
+            fields['FAU'].append(
+                '{}, {}'.format(last_name, fore_name) if fore_name
+                else last_name)
+            fields['AU'].append(
+                '{} {}'.format(last_name, initials) if initials
+                else last_name)
+    return {field: values for field, values in fields.items() if values}
+
+
+def _pagination(article):
+    pagination = element_text(article.find('Pagination/MedlinePgn'))
+    if pagination:
+        return pagination
+    start = element_text(article.find('Pagination/StartPage'))
+    end = element_text(article.find('Pagination/EndPage'))
+    if start:
+        return '{}-{}'.format(start, end) if end else start
+
+
+def _issns(citation, journal):
+    """Returns the ISSNs of the journal as written in Medline, with their
+    type in brackets."""
+    issns = ['{} ({})'.format(element_text(issn), issn.get('IssnType'))
+             if issn.get('IssnType') else element_text(issn)
+             for issn in journal.iterfind('ISSN')]
+    linking = element_text(citation.find('MedlineJournalInfo/ISSNLinking'))
+    if linking:
+        issns.append('{} (Linking)'.format(linking))
+    return issns
+
+
+def _article_fields(element):
+    """
+    Returns a dict mapping Medline field tags to lists of the values that the
+    PubmedArticle element holds for them.
+    """
+    citation = element.find('MedlineCitation')
+    if citation is None:
+        return {}
+    article = citation.find('Article')
+    if article is None:
+        article = ElementTree.Element('Article')
+    journal = article.find('Journal')
+    if journal is None:
+        journal = ElementTree.Element('Journal')
+
+    abstract = [element_text(text)
+                for text in article.iterfind('Abstract/AbstractText')]
+
+    values = (
+        ('PMID', [element_text(citation.find('PMID'))]),
+        ('IS', _issns(citation, journal)),
+        ('VI', [element_text(journal.find('JournalIssue/Volume'))]),
+        ('IP', [element_text(journal.find('JournalIssue/Issue'))]),
+        ('TI', [element_text(article.find('ArticleTitle'))]),
+        ('PG', [_pagination(article)]),
+        ('AB', [' '.join(abstract)]),
+        ('TA', [element_text(citation.find('MedlineJournalInfo/MedlineTA'))]),
+        ('JT', [element_text(journal.find('Title'))]),
+    )
+    fields = {field: field_values for field, field_values in values
+              if any(field_values)}
+    author_list = article.find('AuthorList')
+    if author_list is not None:
+        fields.update(_author_fields(author_list))
+    return fields
+
+
+class PubmedXMLRecord(XMLRecord):
+    """
+    A PubmedArticle element of PubMed's XML format. The raw data of a record
+    is the XML of the element and its fields are named after the Medline tags
+    of the same data (eg, TI for ArticleTitle and FAU for the authors), so
+    records have the same properties as MedlineRecord.
+    """
+    format_name = 'PubMed XML'
+    record_tag = 'PubmedArticle'
+    key_fields = MedlineRecord.key_fields
+    fingerprint_fields = MedlineRecord.fingerprint_fields
+
+    title = MedlineRecord.title
+    abstract = MedlineRecord.abstract
+    authors = MedlineRecord.authors
+    journal_names = MedlineRecord.journal_names
+    issn = MedlineRecord.issn
+    volume = MedlineRecord.volume
+    issue = MedlineRecord.issue
+    pages = MedlineRecord.pages
+
+    @classmethod
+    def _element_fields(cls, element):
+        return _article_fields(element)
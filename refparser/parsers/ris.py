@@ -1,44 +1,122 @@
-from ..utils import cached_property
-from .base import BaseRecord
-from ..exceptions import ReferenceSyntaxError
+import re
+from ..utils import cached_property, find_line_start, LineCounter
+from .base import BaseRecord, compact_record_type, _syntax_error
+
+_unopened = 'record closed without being opened'
+_unclosed = 'record opened without being closed'
 
 
 class RISRecord(BaseRecord):
+    format_name = 'RIS'
+    key_fields = ('ID',)
+    fingerprint_fields = ('TI', 'T1', 'AU', 'A1', 'A2', 'A3', 'SN', 'VL', 'IS',
+                          'SP', 'EP')
+    # a two character tag followed by '  - ' and the value, which is matched
+    # without surrounding whitespace so that it serves as its own token
+    _field_line_format = r'{}  - [^\S\n]*((?:\S(?:.*\S)?)?)'
+    _field_line = re.compile('^' + _field_line_format.format('(..)'), re.M)
+
     @classmethod
-    def parse(cls, data):
+    def _parse_lines(cls, data, errors=None, fields=None, limits=None,
+                     decode=str, offset=0):
         in_record = False
+        # set while the rest of a record that is too large is skipped
+        skipping = False
         record = ''
+        record_line = record_offset = None
+        sizes = None if limits is None else limits.tracker()
 
-        for line in data:
+        for line_number, line in enumerate(data, 1):
             if line.startswith('TY  - '):
                 if in_record:
-                    raise ReferenceSyntaxError
+                    _syntax_error(errors, _unclosed, record_line,
+                                  record_offset)
                 record = line
+                record_line, record_offset = line_number, offset
                 in_record = True
+                skipping = False
             elif line.startswith('ER  - '):
-                if not in_record:
-                    raise ReferenceSyntaxError
-                record += line
-                in_record = False
-                yield cls(record)
-            else:
                 if in_record:
                     record += line
+                    in_record = False
+                    yield cls(decode(record))
+                elif not skipping:
+                    _syntax_error(errors, _unopened, line_number, offset)
+            elif in_record and (fields is None or line[:2] in fields):
+                record += line
+            if in_record and sizes is not None and cls._exceeds_limits(
+                    sizes, line, errors, line_number, record_line,
+                    record_offset):
+                in_record = False
+                record = ''
+                skipping = True
+            offset += len(line)
 
         if in_record:
             # reached end of file with an open record
-            raise ReferenceSyntaxError
-
-    def raw_fields(self):
-        """Returns a generator of tuples containing each raw fields name and
-        value."""
-        for line in self._raw_data.splitlines():
-            try:
-                field, value = line.split('  - ', 1)
-                if len(field) == 2:
-                    yield (field, value.strip())
-            except ValueError:  # couldn't split into 2
-                pass
+            _syntax_error(errors, _unclosed, record_line, record_offset)
+
+    @staticmethod
+    def _is_continuation(line):
+        return line[2:6] != '  - '
+
+    def _raw_values(self, field):
+        return self._raw_field_tokens.get(field)
+
+    @classmethod
+    def split_buffer(cls, buffer, start=0, end=None, final=True,
+                     errors=None):
+        """Returns a generator of (start, end) offsets of each record within
+        the bytes buffer. Unless final is True, a record that may continue
+        past the end of the buffer is left out."""
+        if end is None:
+            end = len(buffer)
+        # lines are only counted to report errors
+        line_at = LineCounter(buffer)
+        pos = start
+        while True:
+            opening = find_line_start(buffer, b'TY  - ', pos, end)
+            closing = find_line_start(buffer, b'ER  - ', pos, end)
+            if closing != -1 and (opening == -1 or closing < opening):
+                _syntax_error(errors, _unopened, line_at(closing), closing)
+                pos = buffer.find(b'\n', closing, end) + 1 or end
+                continue
+            if opening == -1:
+                return
+            if closing == -1:
+                if final:
+                    # reached end of buffer with an open record
+                    _syntax_error(errors, _unclosed, line_at(opening),
+                                  opening)
+                return
+            nested = find_line_start(buffer, b'TY  - ', opening + 1, closing)
+            if nested != -1:
+                _syntax_error(errors, _unclosed, line_at(opening), opening)
+                pos = nested
+                continue
+            pos = buffer.find(b'\n', closing, end) + 1
+            if not pos:
+                if not final:
+                    return
+                pos = end
+            yield (opening, pos)
+
+    @classmethod
+    def _may_end_record(cls, buffer, pos, state):
+        # a record ends at the end of an 'ER  - ' line, which is also where
+        # an unopened or nested record is found
+        line_start = buffer.rfind(b'\n', 0, pos) + 1
+        return find_line_start(buffer, b'ER  - ', line_start) != -1
+
+    @classmethod
+    def next_boundary(cls, buffer, pos):
+        """Returns the offset of the first record boundary at or after pos
+        within the bytes buffer."""
+        if pos > 0 and buffer[pos - 1:pos] != b'\n':
+            # move on to the start of the next line
+            pos = buffer.find(b'\n', pos) + 1 or len(buffer)
+        boundary = find_line_start(buffer, b'TY  - ', pos)
+        return boundary if boundary != -1 else len(buffer)
 
     @cached_property
     def title(self):
@@ -83,3 +161,6 @@ class RISRecord(BaseRecord):
             if '-' in start:
                 start, end = start.split('-', 1)
         return (start, end)
+
+
+CompactRISRecord = compact_record_type(RISRecord)
@@ -0,0 +1,257 @@
+import contextlib
+import functools
+import io
+from xml.etree import ElementTree
+from ..utils import cached_property, count_newlines
+from ..sources import is_path, is_utf8, open_binary
+from ..exceptions import ReferenceSyntaxError, ReferenceSizeError
+from .base import BaseRecord
+
+_unclosed = 'record opened without being closed'
+# size of the chunks of data fed to the XML parser, which builds the elements
+# of a whole chunk before their events are read, as ElementTree.iterparse()
+_chunk_size = 1 << 14
+
+
+def _stop_at_error(records, errors):
+    """
+    Returns a generator of the records from the iterable records up to the
+    first error, which is raised as a ReferenceSyntaxError or, when a list
+    of errors is passed, appended to the list.
+    """
+    try:
+        yield from records
+    except ElementTree.ParseError as e:
+        error = ReferenceSyntaxError(str(e), e.position[0])
+        if errors is None:
+            raise error from e
+        errors.append(error)
+    except ReferenceSizeError as e:
+        if errors is None:
+            raise
+        errors.append(e)
+
+
+def _pull_events(chunks, sizes=False):
+    """
+    Returns a generator of the start and end events of the XML in an
+    iterable of chunks of text or bytes, such as lines. If sizes is true,
+    each chunk is followed by a ('fed', size) event.
+    """
+    parser = ElementTree.XMLPullParser(('start', 'end'))
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.read_events()
+        if sizes:
+            yield ('fed', len(chunk))
+    parser.close()
+    yield from parser.read_events()
+
+
+def _check_record_size(size, limits):
+    """Returns size, the size of the data of a record so far, after raising
+    ReferenceSizeError if it's larger than the record limit."""
+    if size > limits.record:
+        raise ReferenceSizeError(
+            'record larger than {}'.format(limits.record))
+    return size
+
+
+def element_text(element):
+    """Returns all the text within element, including that of any inline
+    markup, or None if there's no element."""
+    if element is not None:
+        return ''.join(element.itertext()).strip()
+
+
+class XMLRecord(BaseRecord):
+    """
+    A record held in an element of an XML file. The raw data of a record is
+    the XML of the element, and its fields are extracted from the element by
+    _element_fields() rather than located by offsets within the raw data.
+    """
+    # tag of the elements that hold the records, which must have no attributes
+    record_tag = None
+
+    @classmethod
+    def parse(cls, data, errors=None, fields=None, encoding=None,
+              encoding_errors='strict', limits=None, stats=None):
+        """
+        Returns a generator of the records parsed from data, which is either
+        a path or a file object, optionally compressed. The XML is parsed
+        incrementally and each record's element is cleared from the document
+        as soon as the record is made, so memory use doesn't grow with the
+        size of the file.
+
+        Binary data is decoded with the encoding declared by the XML unless
+        encoding is passed, in which case it's decoded with that encoding
+        instead, handling invalid bytes according to encoding_errors (as the
+        errors argument of bytes.decode() does). As the declared encoding is
+        applied by the XML parser, which only fails on invalid bytes,
+        encoding_errors other than 'strict' raise a ValueError without an
+        encoding. Text file objects are used as they are.
+
+        Invalid XML raises a ReferenceSyntaxError unless a list is passed as
+        errors, in which case the error is appended to it and parsing stops.
+
+        If limits, a SizeLimits object, is passed, ReferenceSizeError is
+        raised, or appended to errors, once the data read since the start of
+        a record's element grows past the record limit, which is checked
+        after each block of data read, the blocks being no larger than the
+        limit. The other limits don't apply to XML.
+
+        Fields and stats are handled as by BaseRecord.parse().
+        """
+        if encoding is None and encoding_errors != 'strict':
+            raise ValueError(
+                'encoding_errors {!r} needs an encoding, as the declared '
+                'encoding of XML is strict'.format(encoding_errors))
+        with contextlib.ExitStack() as stack:
+            if is_path(data) or isinstance(data.read(0), bytes):
+                data = stack.enter_context(open_binary(data))
+                if encoding is not None:
+                    if is_utf8(encoding):
+                        encoding = 'utf-8-sig'
+                    data = io.TextIOWrapper(data, encoding, encoding_errors)
+                    stack.callback(data.detach)
+            size = _chunk_size
+            if limits is not None and limits.record is not None:
+                size = max(min(size, limits.record), 1)
+            chunks = iter(functools.partial(data.read, size), data.read(0))
+            records = cls._parse_lines(chunks, errors, fields, limits)
+            if stats is not None:
+                records = stats.observe(records)
+            yield from records
+
+    @classmethod
+    def _parse_lines(cls, data, errors=None, fields=None, limits=None,
+                     decode=None, offset=0):
+        """
+        Returns a generator of the records parsed from an iterable of chunks
+        of XML, such as the lines that parse_any() passes, which are passed
+        to decode() first if it's given. Errors, fields and limits are
+        handled as by parse().
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+        if limits is not None and limits.record is None:
+            limits = None
+        if decode is not None:
+            data = map(decode, data)
+        return _stop_at_error(cls._records(
+            _pull_events(data, limits is not None), fields, limits), errors)
+
+    @classmethod
+    def _records(cls, events, fields, limits=None):
+        # the open elements, from the root to the current one
+        path = []
+        record_depth = None
+        # size of the data fed since the start of the current record
+        size = None
+        for event, element in events:
+            if event == 'fed':
+                if size is not None:
+                    size = _check_record_size(size + element, limits)
+                continue
+            if event == 'start':
+                path.append(element)
+                if element.tag == cls.record_tag:
+                    size = 0
+                continue
+            path.pop()
+            if element.tag == cls.record_tag:
+                yield cls.from_element(element, fields)
+                record_depth = len(path)
+                size = None
+            if path and len(path) == record_depth:
+                # drop the records (and anything alongside them) once read
+                path[-1].clear()
+
+    @classmethod
+    def from_element(cls, element, fields=None):
+        """Returns a record of an element, holding only the fields named in
+        fields if it isn't None."""
+        element.tail = None
+        record = cls(ElementTree.tostring(element, encoding='unicode'))
+        values = cls._element_fields(element)
+        if fields is not None:
+            values = {field: field_values
+                      for field, field_values in values.items()
+                      if field in fields}
+        record._raw_field_values = values
+        return record
+
+    @classmethod
+    def _element_fields(cls, element):
+        """Returns a dict mapping field names to lists of the values that the
+        element holds for them."""
+        return {}
+
+    @classmethod
+    def split_buffer(cls, buffer, start=0, end=None, final=True,
+                     errors=None):
+        """Returns a generator of (start, end) offsets of each record's
+        element within the bytes buffer. Unless final is True, an element
+        that may continue past the end of the buffer is left out."""
+        if end is None:
+            end = len(buffer)
+        start_tag = '<{}>'.format(cls.record_tag).encode('ascii')
+        end_tag = '</{}>'.format(cls.record_tag).encode('ascii')
+        pos = start
+        while True:
+            opening = buffer.find(start_tag, pos, end)
+            if opening == -1:
+                return
+            closing = buffer.find(end_tag, opening, end)
+            following = buffer.find(start_tag, opening + 1,
+                                    end if closing == -1 else closing)
+            if following != -1 or (closing == -1 and final):
+                error = ReferenceSyntaxError(
+                    _unclosed, count_newlines(buffer, 0, opening) + 1,
+                    opening)
+                if errors is None:
+                    raise error
+                errors.append(error)
+                if following == -1:
+                    return
+                pos = following
+                continue
+            if closing == -1:
+                return
+            pos = closing + len(end_tag)
+            yield (opening, pos)
+
+    @classmethod
+    def _may_end_record(cls, buffer, pos, state):
+        # a record ends at its end tag, and a start tag before it is an error
+        for tag in ('<{}>', '</{}>'):
+            tag = tag.format(cls.record_tag).encode('ascii')
+            if buffer.find(tag, max(pos - len(tag) + 1, 0)) != -1:
+                return True
+        return False
+
+    @classmethod
+    def next_boundary(cls, buffer, pos):
+        """Returns the offset of the first record boundary at or after pos
+        within the bytes buffer."""
+        start_tag = '<{}>'.format(cls.record_tag).encode('ascii')
+        boundary = buffer.find(start_tag, pos)
+        return len(buffer) if boundary == -1 else boundary
+
+    @cached_property
+    def _raw_field_values(self):
+        return self._element_fields(ElementTree.fromstring(self._raw_data))
+
+    @cached_property
+    def _raw_field_tokens(self):
+        # the values are extracted from the element, there are no other
+        # tokens
+        return self._raw_field_values
+
+    def _raw_values(self, field):
+        return self._raw_field_values.get(field)
+
+    def raw_fields(self):
+        for field, values in self._raw_field_values.items():
+            for value in values:
+                yield (field, value)
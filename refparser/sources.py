@@ -0,0 +1,206 @@
+"""
+Opening the sources that records are parsed from: paths or file objects,
+optionally compressed with gzip, bzip2, xz or zip. Compressed data is
+decompressed as it is read, so it never has to be written to disk or held in
+memory in full.
+"""
+import bz2
+import codecs
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import zipfile
+
+# size of the buffers used when reading files and decompressing data
+block_size = 1 << 20
+
+_signatures = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'PK\x03\x04', 'zip'),
+)
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def is_utf8(encoding):
+    return codecs.lookup(encoding).name == 'utf-8'
+
+
+def is_ascii_compatible(encoding):
+    """Returns True if the encoding encodes ASCII text as ASCII bytes, so
+    that records can be found in the encoded data by their ASCII tags."""
+    sample = ''.join(map(chr, range(128)))
+    try:
+        return codecs.encode(sample, encoding) == sample.encode('ascii')
+    except UnicodeError:
+        return False
+
+
+def _peek(f, size):
+    """Returns the next size bytes of the binary file object f, leaving its
+    position unchanged."""
+    if hasattr(f, 'peek'):
+        return f.peek(size)[:size]
+    position = f.tell()
+    head = f.read(size)
+    f.seek(position)
+    return head
+
+
+def compression(f):
+    """
+    Returns the name of the compression format of the binary file object f,
+    judged from its first bytes, or None if it isn't compressed. The file
+    position is left unchanged.
+    """
+    head = _peek(f, 8)
+    for signature, name in _signatures:
+        if head.startswith(signature):
+            return name
+
+
+class _ConcatenatedReader(io.RawIOBase):
+    """A raw stream that reads the binary file objects it is given one after
+    the other, closing each one when it is exhausted. A newline is inserted
+    after any file that doesn't end with one, so that the last line of a file
+    never runs into the first line of the next."""
+    def __init__(self, files):
+        self._files = iter(files)
+        self._current = next(self._files, None)
+        self._ends_line = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._current is not None:
+            count = self._current.readinto(b)
+            if count:
+                self._ends_line = bytes(b[count - 1:count]) == b'\n'
+                return count
+            self._current.close()
+            self._current = next(self._files, None)
+            if self._current is not None and not self._ends_line:
+                self._ends_line = True
+                b[:1] = b'\n'
+                return 1
+        return 0
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _zip_members(archive):
+    for info in archive.infolist():
+        if not info.is_dir():
+            yield archive.open(info)
+
+
+def _decompressed(f):
+    kind = compression(f)
+    if kind == 'gzip':
+        f = gzip.GzipFile(fileobj=f, mode='rb')
+    elif kind == 'bz2':
+        f = bz2.BZ2File(f, mode='rb')
+    elif kind == 'xz':
+        f = lzma.LZMAFile(f, mode='rb')
+    elif kind == 'zip':
+        f = _ConcatenatedReader(_zip_members(zipfile.ZipFile(f)))
+    else:
+        return f
+    return io.BufferedReader(f, block_size)
+
+
+@contextlib.contextmanager
+def open_binary(source):
+    """
+    Returns a context manager for a binary file object reading the
+    decompressed content of source, which is either a path or a binary file
+    object. All the members of a zip archive are read one after the other.
+    File objects passed in are left open.
+    """
+    with contextlib.ExitStack() as stack:
+        if is_path(source):
+            f = stack.enter_context(open(source, 'rb', buffering=block_size))
+        else:
+            f = source
+            if not hasattr(f, 'peek') and not f.seekable():
+                f = io.BufferedReader(f, block_size)
+        decompressed = _decompressed(f)
+        if decompressed is not f:
+            stack.enter_context(decompressed)
+        yield decompressed
+
+
+@contextlib.contextmanager
+def open_lines(source, encoding='utf-8', encoding_errors='strict'):
+    """
+    Returns a context manager for an iterable of the lines of text in source.
+    Paths and binary file objects are opened with open_binary() and decoded
+    in large blocks by a single incremental decoder, which handles bytes that
+    are invalid in the encoding according to encoding_errors (as the errors
+    argument of bytes.decode() does). A UTF-8 byte order mark is dropped and
+    CRLF line endings become LF. Any other source, such as a text file or a
+    list of lines, is used as it is.
+    """
+    if is_path(source) or (hasattr(source, 'read') and
+                           isinstance(source.read(0), bytes)):
+        if is_utf8(encoding):
+            encoding = 'utf-8-sig'
+        with open_binary(source) as f:
+            lines = io.TextIOWrapper(f, encoding, encoding_errors)
+            try:
+                yield lines
+            finally:
+                lines.detach()
+    else:
+        yield source
+
+
+def _record_decoder(encoding, encoding_errors):
+    def decode(text):
+        text = text.encode('latin-1').decode(encoding, encoding_errors)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    return decode
+
+
+@contextlib.contextmanager
+def open_raw_lines(source, encoding='utf-8', encoding_errors='strict'):
+    """
+    Returns a context manager for a (lines, start, decode) tuple, which is
+    the same as (open_lines(source), 0, str) except for paths and binary
+    file objects in an encoding compatible with ASCII. Their lines are left
+    undecoded: each is read as latin-1 text, with one character per byte and
+    its line ending unchanged, so that the lengths of the lines add up to
+    byte offsets. start is then the offset of the first line, which is past
+    a UTF-8 byte order mark, and decode() returns the text of a record made
+    of such lines decoded and with its line endings turned into LF.
+    """
+    if not is_ascii_compatible(encoding) or not (
+            is_path(source) or (hasattr(source, 'read') and
+                                isinstance(source.read(0), bytes))):
+        with open_lines(source, encoding, encoding_errors) as lines:
+            yield lines, 0, str
+        return
+    with open_binary(source) as f:
+        start = 0
+        if codecs.lookup(encoding).name in ('utf-8', 'utf-8-sig'):
+            encoding = 'utf-8'
+            if _peek(f, len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                start = len(f.read(len(codecs.BOM_UTF8)))
+        lines = io.TextIOWrapper(f, 'latin-1', newline='')
+        try:
+            yield lines, start, _record_decoder(encoding, encoding_errors)
+        finally:
+            lines.detach()
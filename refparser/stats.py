@@ -0,0 +1,85 @@
+"""
+Instrumentation of parsing. A ParseStats object passed to the parse methods
+(or given records through observe()) counts what is parsed and adds up the
+time spent in each stage of processing the records. Without one, parsing runs
+exactly as it otherwise would.
+"""
+import collections
+import time
+
+# the stages that timings are kept for
+stages = ('splitting', 'fields', 'fingerprinting', 'normalization')
+
+
+class ParseStats:
+    """
+    Counts the records parsed, the bytes of input they were made from and the
+    values of each field, and adds up the seconds spent in each stage:
+
+        splitting       reading the input and splitting it into records
+        fields          extracting the records' fields
+        fingerprinting  computing the records' fingerprints, which includes
+        normalization   normalizing the values the fingerprints are made of
+
+    Fingerprints are computed whenever they are first used, so their timings
+    keep growing as long as the observed records are in use.
+    """
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+        self.fields = collections.Counter()
+        self.timings = dict.fromkeys(stages, 0.0)
+
+    def observe(self, records):
+        """
+        Returns a generator of the records from the iterable records, counting
+        them and extracting their fields as they pass. Each record is made to
+        report the time spent computing its fingerprints.
+        """
+        timings = self.timings
+        records = iter(records)
+        while True:
+            started = time.perf_counter()
+            record = next(records, None)
+            extracting = time.perf_counter()
+            timings['splitting'] += extracting - started
+            if record is None:
+                return
+            tokens = record._raw_field_tokens
+            timings['fields'] += time.perf_counter() - extracting
+            for field, field_tokens in tokens.items():
+                self.fields[field] += len(field_tokens)
+            self.records += 1
+            self.bytes += _record_size(record)
+            record._stats = self
+            yield record
+
+    def time(self, stage, func, *args):
+        """Returns func(*args), adding the time it takes to the timing of
+        stage."""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings[stage] += time.perf_counter() - started
+
+    @property
+    def records_per_second(self):
+        elapsed = self.timings['splitting'] + self.timings['fields']
+        return self.records / elapsed if elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'fields': dict(self.fields),
+            'timings': dict(self.timings),
+        }
+
+
+def _record_size(record):
+    span = getattr(record, '_span', None)
+    if span is not None:
+        # records backed by a buffer know the size of their input
+        return span[1] - span[0]
+    return len(record._raw_data.encode('utf-8'))
@@ -1,3 +1,8 @@
+import codecs
+import mmap
+import os
+
+
 class cached_property(object):  # noqa
     # From the excellent Bottle (c) Marcel Hellkamp
     # https://github.com/bottlepy/bottle
@@ -15,3 +20,123 @@ class cached_property(object):  # noqa
             return self
         value = obj.__dict__[self.func.__name__] = self.func(obj)
         return value
+
+
+def find_line_start(buffer, prefix, start=0, end=None):
+    """
+    Returns the offset of the first line in buffer[start:end] that begins with
+    prefix or -1 if there is no such line, taking start to be the beginning
+    of a line. Works on bytes, bytearrays and memory maps without copying the
+    searched data.
+    """
+    if end is None:
+        end = len(buffer)
+    if start + len(prefix) <= end and \
+            buffer[start:start + len(prefix)] == prefix:
+        return start
+    index = buffer.find(b'\n' + prefix, start, end)
+    if index == -1:
+        return -1
+    return index + 1
+
+
+def map_file(path):
+    """
+    Returns a read-only memory map of the file at path. Empty files, which
+    can't be mapped, are returned as an empty bytes object.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def close_map(buffer):
+    """Closes a memory map returned by map_file(), which may also be an
+    empty bytes object."""
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+def data_start(buffer):
+    """Returns the offset at which the data in buffer starts, which is past
+    a UTF-8 byte order mark if there is one."""
+    if buffer[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+        return len(codecs.BOM_UTF8)
+    return 0
+
+
+class cached_slot(object):  # noqa
+    """ The __slots__ counterpart of cached_property, for classes whose
+        instances have no __dict__. The computed value is stored in the slot
+        named by slot_name(), which the class must declare. Deleting the
+        attribute resets the property. """
+
+    def __init__(self, func):
+        self.__doc__ = getattr(func, '__doc__')
+        self.func = func
+
+    @staticmethod
+    def slot_name(name):
+        return '_cached_' + name
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__[self.slot_name(name)]
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, cls)
+        except AttributeError:
+            value = self.func(obj)
+            self.slot.__set__(obj, value)
+            return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+async def iter_chunks_async(stream, size=65536):
+    """
+    Returns an async generator of the chunks of bytes read from stream, which
+    is either an object with an awaitable read() method, like
+    asyncio.StreamReader, or an async iterable of chunks.
+    """
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in stream:
+            yield chunk
+
+
+def count_newlines(buffer, start, end, block_size=1 << 20):
+    """
+    Returns the number of newlines in buffer[start:end], copying at most
+    block_size bytes at a time since memory maps have no count() method.
+    """
+    count = 0
+    for pos in range(start, end, block_size):
+        count += buffer[pos:min(pos + block_size, end)].count(b'\n')
+    return count
+
+
+class LineCounter:
+    """Returns the number of the line at each of a series of increasing
+    offsets within a buffer, counting each line only once."""
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+        self.line_number = 1
+
+    def __call__(self, offset):
+        self.line_number += count_newlines(self.buffer, self.offset, offset)
+        self.offset = offset
+        return self.line_number
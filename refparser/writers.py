@@ -0,0 +1,167 @@
+"""
+Buffered writers that serialize records, or the rows of record batches, as
+RIS or Medline. Records of the writer's own format are written field by field
+from their raw data. Any other record is written from its properties.
+"""
+
+
+def _record_values(record):
+    """Returns a dict of the properties of a record that the writers
+    serialize."""
+    return {name: getattr(record, name) for name in (
+        'title', 'abstract', 'authors', 'journal_names', 'issn', 'volume',
+        'issue', 'pages')}
+
+
+class BaseWriter:
+    format_name = None
+
+    def __init__(self, f, buffer_size=1 << 20):
+        self._f = f
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, record):
+        if getattr(record, 'format_name', None) == self.format_name:
+            fields = record.raw_fields()
+        else:
+            fields = self.fields_from_values(_record_values(record))
+        self._append(self.format_record(fields))
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def write_values(self, values):
+        """Writes a record with the property values in the dict values."""
+        self.write_fields(self.fields_from_values(values))
+
+    def write_fields(self, fields):
+        """Writes a record made of the (name, value) tuples in fields."""
+        self._append(self.format_record(fields))
+
+    def write_batch(self, batch):
+        """Writes each row of a RecordBatch as a record."""
+        for row in batch.rows():
+            self.write_values(row)
+
+    def fields_from_values(self, values):
+        """Returns a generator of (name, value) tuples for the fields of a
+        record with the property values in the dict values."""
+        pass
+
+    def format_record(self, fields):
+        """Returns the text of a record made of the (name, value) tuples in
+        fields."""
+        pass
+
+    def _append(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Writes out the buffered records."""
+        if self._buffer:
+            self._f.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+
+class RISWriter(BaseWriter):
+    format_name = 'RIS'
+
+    def fields_from_values(self, values):
+        yield ('TY', 'JOUR')
+        if values.get('title'):
+            yield ('TI', values['title'])
+        for author in values.get('authors') or ():
+            yield ('AU', author)
+        for name in sorted(values.get('journal_names') or ()):
+            yield ('JF', name)
+        for name, field in (('issn', 'SN'), ('volume', 'VL'),
+                            ('issue', 'IS')):
+            if values.get(name):
+                yield (field, values[name])
+        start, end = values.get('pages') or (None, None)
+        if start:
+            yield ('SP', start)
+        if end:
+            yield ('EP', end)
+        if values.get('abstract'):
+            yield ('AB', values['abstract'])
+        yield ('ER', '')
+
+    def format_record(self, fields):
+        lines = ['{}  - {}\n'.format(field, value.replace('\n', ' '))
+                 for field, value in fields]
+        lines.append('\n')
+        return ''.join(lines)
+
+
+def _wrap(line, width):
+    """Returns a generator of pieces of line no longer than width, broken at
+    spaces, except for words longer than width."""
+    while len(line) > width:
+        cut = line.rfind(' ', 0, width + 1)
+        if cut <= 0:
+            cut = line.find(' ', width)
+            if cut == -1:
+                break
+        yield line[:cut]
+        line = line[cut + 1:]
+    yield line
+
+
+class MedlineWriter(BaseWriter):
+    format_name = 'Medline'
+
+    def __init__(self, f, buffer_size=1 << 20, line_width=80):
+        super().__init__(f, buffer_size)
+        self.line_width = line_width
+
+    def fields_from_values(self, values):
+        if values.get('title'):
+            yield ('TI', values['title'])
+        if values.get('abstract'):
+            yield ('AB', values['abstract'])
+        for author in values.get('authors') or ():
+            yield ('FAU', author)
+        for name in sorted(values.get('journal_names') or ()):
+            yield ('JT', name)
+        for name, field in (('issn', 'IS'), ('volume', 'VI'),
+                            ('issue', 'IP')):
+            if values.get(name):
+                yield (field, values[name])
+        start, end = values.get('pages') or (None, None)
+        if start:
+            yield ('PG', '{}-{}'.format(start, end) if end else start)
+
+    def format_record(self, fields):
+        # values are wrapped onto continuation lines, which are indented by
+        # six spaces. Values that already span several lines (as parsed from
+        # Medline) keep their line breaks.
+        width = self.line_width - 6
+        lines = []
+        for field, value in fields:
+            prefix = '{:<4}- '.format(field)
+            if '\n' in value:
+                pieces = value.split('\n')
+            else:
+                pieces = _wrap(value, width)
+            for piece in pieces:
+                # a blank line would end the record
+                if prefix == '      ' and not piece.strip():
+                    continue
+                lines.append(prefix + piece + '\n')
+                prefix = '      '
+        lines.append('\n')
+        return ''.join(lines)
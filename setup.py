@@ -3,5 +3,8 @@ from setuptools import setup, find_packages
 setup(
     name='refparser',
     version='0.0.1.dev1',
-    packages=find_packages(),
+    packages=find_packages(exclude=('benchmarks', 'benchmarks.*')),
+    entry_points={
+        'console_scripts': ['refparser = refparser.cli:main'],
+    },
 )
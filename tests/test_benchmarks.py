@@ -0,0 +1,228 @@
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from benchmarks.cli import main
+from benchmarks.corpus import Corpus, formats, generate_values, write_values
+from benchmarks.duplicates import DuplicateCorpus, _make_changes, \
+    change_rates, evaluate, generate_duplicates, make_label, parse_label
+from benchmarks.regression import load_baseline, regressions, \
+    save_baseline
+from benchmarks.scenarios import benchmark_keys, run_benchmarks, scenarios
+
+
+def unwrapped(value):
+    # Medline values span continuation lines
+    if isinstance(value, str):
+        return value.replace('\n', ' ')
+    if isinstance(value, set):
+        return set(map(unwrapped, value))
+    return value
+
+
+class TestCorpus(unittest.TestCase):
+    def test_generating_values(self):
+        values = list(generate_values(50, seed=1))
+        self.assertEqual(values, list(generate_values(50, seed=1)))
+        self.assertNotEqual(values, list(generate_values(50, seed=2)))
+
+    def test_parsing_generated_records(self):
+        values = list(generate_values(50))
+        for format, (record_type, writer_type) in formats.items():
+            with self.subTest(format=format):
+                f = io.StringIO()
+                write_values(f, format, values)
+                f.seek(0)
+                records = list(record_type.parse(f))
+                self.assertEqual(len(records), len(values))
+                for record, record_values in zip(records, values):
+                    for name, value in record_values.items():
+                        self.assertEqual(
+                            unwrapped(getattr(record, name)), value)
+
+    def test_writing_corpus_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        corpus = Corpus('medline', 20, directory=directory)
+        with open(corpus.path, encoding='utf-8') as f:
+            text = f.read()
+        self.assertIn('\n      ', text)
+        other = corpus.in_format('ris')
+        self.assertEqual(len(list(other.record_type.parse(other.path))), 20)
+        self.assertEqual(Corpus('medline', 20, directory=directory).path,
+                         corpus.path)
+        # files made by other versions of the generator aren't reused
+        with mock.patch('benchmarks.corpus.source_hash',
+                        return_value='changed'):
+            path = Corpus('medline', 20, directory=directory).path
+        self.assertNotEqual(path, corpus.path)
+        self.assertTrue(os.path.exists(path))
+
+
+class TestScenarios(unittest.TestCase):
+    def test_running_benchmarks(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        reported = []
+        results = run_benchmarks(benchmark_keys(formats), 30, repeat=1,
+                                 directory=directory,
+                                 report=lambda *args: reported.append(args))
+        self.assertEqual(list(results), [
+            '{}.{}'.format(format, name)
+            for format in formats for name in scenarios])
+        self.assertEqual(reported, list(results.items()))
+        for key, result in results.items():
+            with self.subTest(key=key):
+                self.assertEqual(result['records'], 30)
+                self.assertGreater(result['records_per_second'], 0)
+                self.assertGreater(result['peak_memory'], 0)
+
+
+def result(records_per_second, peak_memory, calibration=1.0):
+    return {'records_per_second': records_per_second,
+            'peak_memory': peak_memory, 'calibration': calibration}
+
+
+class TestRegressions(unittest.TestCase):
+    baseline = {
+        'ris.parse': result(1000, 1 << 20),
+        'ris.field_access': result(1000, 100 << 20),
+    }
+
+    def test_finding_regressions(self):
+        cases = (
+            ((result(700, 1 << 20), result(1000, 100 << 20)), []),
+            ((result(500, 1 << 20), result(1000, 100 << 20)),
+             [('ris.parse', 'relative_speed', 1000, 500)]),
+            # slower on a slower machine
+            ((result(500, 1 << 20, 2.0), result(1000, 100 << 20)), []),
+            # small peaks can grow by a little
+            ((result(1000, 2 << 20), result(1000, 100 << 20)), []),
+            ((result(1000, 1 << 20), result(1000, 150 << 20)),
+             [('ris.field_access', 'peak_memory', 100 << 20, 150 << 20)]),
+        )
+        for (parse, field_access), expected in cases:
+            with self.subTest(parse=parse, field_access=field_access):
+                results = {
+                    'ris.parse': parse,
+                    'ris.field_access': field_access,
+                    'medline.parse': result(1, 1 << 30),
+                }
+                self.assertEqual(regressions(self.baseline, results),
+                                 expected)
+
+    def test_comparing_with_a_baseline(self):
+        """
+        Make a baseline, then check that comparing with it passes when it is
+        slower than the code and fails when it is much faster.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'baseline.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(['run', '-n', '20', '-r', '1', '-s', 'parse',
+                  '--corpus-dir', directory, '--json', path])
+        baseline = load_baseline(path)
+        self.assertEqual(set(baseline['results']),
+                         {'ris.parse', 'medline.parse'})
+        for factor, status in ((0.1, 0), (10, 1)):
+            with self.subTest(factor=factor):
+                results = {
+                    key: dict(value, records_per_second=value[
+                        'records_per_second'] * factor)
+                    for key, value in baseline['results'].items()}
+                save_baseline(results, baseline['records'], baseline['seed'],
+                              path)
+                stderr = io.StringIO()
+                with contextlib.redirect_stdout(io.StringIO()), \
+                        contextlib.redirect_stderr(stderr):
+                    self.assertEqual(main(['compare', '-b', path, '-r', '1',
+                                           '--corpus-dir', directory]),
+                                     status)
+                self.assertEqual(bool(stderr.getvalue()), bool(status))
+
+
+class TestDuplicates(unittest.TestCase):
+    def test_labels(self):
+        cases = (
+            (42, ('online_issn', 'other_format'),
+             '42:online_issn+other_format'),
+            (0, (), '0:'),
+            (None, (), '-:'),
+        )
+        for position, changes, label in cases:
+            with self.subTest(label=label):
+                self.assertEqual(make_label(position, changes), label)
+                self.assertEqual(parse_label(label), (position, changes))
+
+    def test_generating_duplicates(self):
+        values = list(generate_values(200))
+        duplicates = list(generate_duplicates(200))
+        self.assertEqual(duplicates, list(generate_duplicates(200)))
+        changed = set()
+        for label, duplicate in duplicates:
+            position, changes = parse_label(label)
+            if position is None:
+                continue
+            original = values[position]
+            changed.update(changes)
+            if set(changes) - {'other_format'}:
+                self.assertNotEqual(duplicate, original)
+            if 'online_issn' in changes:
+                self.assertNotEqual(duplicate['issn'], original['issn'])
+            if 'truncated_pages' in changes:
+                self.assertTrue(original['pages'][1].endswith(
+                    duplicate['pages'][1]))
+                self.assertNotEqual(duplicate['pages'], original['pages'])
+            if 'shuffled_authors' in changes:
+                self.assertGreater(len(duplicate['authors']), 1)
+            if not changes:
+                self.assertEqual(duplicate, original)
+        self.assertEqual(changed, set(change_rates))
+
+    def test_labelling_only_made_changes(self):
+        values = {'authors': ['Cushing, Harvey'], 'pages': ('370', '370')}
+        cases = (
+            (('shuffled_authors', 'truncated_pages'), []),
+            (('reversed_authors', 'other_format'), ['other_format']),
+        )
+        for changes, made in cases:
+            with self.subTest(changes=changes):
+                self.assertEqual(
+                    _make_changes(values, changes, random.Random(0)),
+                    (values, made))
+        values = {'authors': ['Cushing, Harvey'], 'pages': ('37', '52')}
+        self.assertEqual(_make_changes(values, ('truncated_pages',),
+                                       random.Random(0)), (values, []))
+
+    def test_evaluating_duplicates(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        corpus = DuplicateCorpus('ris', 200, directory=directory)
+        labels = []
+        for format, path in corpus.paths.items():
+            record_type = formats[format][0]
+            for record in record_type.parse(path):
+                label = record._first_raw_value(*record_type.key_fields)
+                labels.append(label)
+                self.assertEqual(
+                    format, 'medline' if 'other_format' in parse_label(
+                        label)[1] else 'ris')
+        results = evaluate(corpus)
+        self.assertEqual(results['originals'], 200)
+        self.assertEqual(results['duplicates'] + results['unrelated'],
+                         len(labels))
+        self.assertEqual(results['unrelated'], labels.count('-:'))
+        self.assertEqual(results['recall']['exact'], {
+            'location_fingerprint': 1.0,
+            'title_authors_fingerprint': 1.0,
+            'all_matches': 1.0,
+        })
+        # the online ISSN isn't mapped to the print ISSN by the fingerprint
+        self.assertEqual(
+            results['recall']['online_issn']['location_fingerprint'], 0.0)
+        self.assertEqual(results['precision'], 1.0)
@@ -0,0 +1,107 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from refparser.parsers import BibTeXRecord, MedlineRecord, IncrementalParser
+from refparser.exceptions import ReferenceSyntaxError
+
+filename = 'test_data/bibtex/valid.bib'
+
+
+class TestBibTeXRecord(unittest.TestCase):
+    def test_record_data(self):
+        records = list(BibTeXRecord.parse(filename))
+        self.assertEqual(len(records), 2)
+        record = records[0]
+        self.assertEqual(record._first_raw_value('ENTRYTYPE'), 'Article')
+        self.assertEqual(record._first_raw_value('ID'), 'zoidberg2019')
+        self.assertEqual(record.title, 'A systematic review of the safety and '
+                         'efficacy of performing surgery on Human subjects '
+                         'by alien surgeons')
+        self.assertEqual(record.authors, [
+            'Zoidberg, J. A.', 'Leela, T.', 'Rodríguez, B. B.', 'Conrad, H.',
+            'Fansworth, H.'])
+        self.assertEqual(record.issn, '9919-991X')
+        self.assertEqual(record.volume, '23119')
+        self.assertEqual(record.issue, '4')
+        self.assertEqual(record.pages, ('370', '374'))
+        self.assertEqual(record._first_raw_value('note'), 'part one')
+        self.assertEqual(records[1].title, 'The Life of Sir William Osler')
+        self.assertEqual(records[1].authors, ['Harvey Cushing'])
+
+    def test_matching_medline_fingerprints(self):
+        record = next(BibTeXRecord.parse(filename))
+        with open('test_data/pubmed/complex_record.txt') as f:
+            medline_record = MedlineRecord(f.read())
+        for name in ('title_authors_fingerprint', 'location_fingerprint'):
+            self.assertEqual(getattr(record, name),
+                             getattr(medline_record, name))
+
+    def test_parsing_fields(self):
+        records = BibTeXRecord.parse(filename, fields=('title', 'pages'))
+        self.assertEqual(
+            [field for field, value in next(records).raw_fields()],
+            ['ENTRYTYPE', 'ID', 'title', 'pages'])
+
+    def test_parsing_invalid_files(self):
+        data = '@article{a,\n title = {A}\n\n@article{b,\n title = {B}}\n'
+        with self.assertRaises(ReferenceSyntaxError) as cm:
+            list(BibTeXRecord.parse(io.StringIO(data)))
+        self.assertEqual(cm.exception.line_number, 1)
+
+        errors = []
+        records = list(BibTeXRecord.parse(io.StringIO(data), errors))
+        self.assertEqual([r.title for r in records], ['B'])
+        self.assertEqual(len(errors), 1)
+
+    def test_parsing_bytes(self):
+        """
+        Parse the file from bytes through each of the entry points that split
+        a buffer and check that they find the same entries as parse().
+        """
+        expected = [r._raw_data for r in BibTeXRecord.parse(filename)]
+        with open(filename, 'rb') as f:
+            data = f.read()
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'valid.bib')
+        shutil.copy(filename, path)
+
+        async def chunks():
+            for i in range(len(data)):
+                yield data[i:i + 1]
+
+        async def parse_async():
+            return [r async for r in BibTeXRecord.aparse(chunks())]
+
+        parser = IncrementalParser(BibTeXRecord)
+        incremental = []
+        for i in range(len(data)):
+            incremental += parser.feed(data[i:i + 1])
+        incremental += parser.close()
+        entry_points = (
+            ('parse_file', list(BibTeXRecord.parse_file(path))),
+            ('parse_parallel',
+             list(BibTeXRecord.parse_parallel(path, workers=2))),
+            ('fetch', [BibTeXRecord.fetch(path, 0),
+                       BibTeXRecord.fetch(path, key='cushing1925')]),
+            ('aparse', asyncio.run(parse_async())),
+            ('IncrementalParser', incremental),
+        )
+        for name, records in entry_points:
+            with self.subTest(name=name):
+                self.assertEqual([r._raw_data for r in records], expected)
+
+    def test_splitting_invalid_buffers(self):
+        data = b'@article{a,\n title = {A}\n\n@article{b,\n title = {B}}\n'
+        with self.assertRaises(ReferenceSyntaxError) as cm:
+            list(BibTeXRecord.split_buffer(data))
+        self.assertEqual(cm.exception.line_number, 1)
+
+        errors = []
+        spans = list(BibTeXRecord.split_buffer(data, errors=errors))
+        self.assertEqual([data[start:end] for start, end in spans],
+                         [b'@article{b,\n title = {B}}\n'])
+        self.assertEqual(len(errors), 1)
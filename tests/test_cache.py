@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from refparser.cache import RecordCache
+from refparser.parsers import RISRecord, MedlineRecord
+
+
+class TestRecordCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_loading_cached_records(self):
+        """
+        Load files through the cache twice and check that the second load
+        returns the same records without parsing or fingerprinting them.
+        """
+        cache = RecordCache(os.path.join(self.tmpdir, 'cache'))
+        files = (
+            ('test_data/ris/valid.ris', RISRecord),
+            ('test_data/pubmed/complex_record.txt', MedlineRecord),
+        )
+        for filename, record_type in files:
+            with self.subTest(filename=filename, record_type=record_type):
+                parsed = cache.load(record_type, filename)
+                with mock.patch.object(record_type, 'parse') as parse, \
+                        mock.patch('refparser.parsers.base.'
+                                   'normalize_text_value') as normalize:
+                    cached = cache.load(record_type, filename)
+                parse.assert_not_called()
+                normalize.assert_not_called()
+                for name in ('_raw_data', 'title', 'authors', 'pages',
+                             'location_fingerprint',
+                             'title_authors_fingerprint'):
+                    self.assertEqual([getattr(r, name) for r in cached],
+                                     [getattr(r, name) for r in parsed])
+
+    def test_changed_content_is_parsed_again(self):
+        path = os.path.join(self.tmpdir, 'valid.ris')
+        shutil.copy('test_data/ris/valid.ris', path)
+        cache = RecordCache(os.path.join(self.tmpdir, 'cache'))
+        self.assertEqual(len(cache.load(RISRecord, path)), 2)
+        with open(path, 'a') as f:
+            f.write('TY  - JOUR\nID  - 999\nER  - \n')
+        self.assertEqual(len(cache.load(RISRecord, path)), 3)
+
+    def test_other_versions_are_parsed_again(self):
+        """
+        Check that files cached by another version of Python or of the cache
+        format aren't read.
+        """
+        cache = RecordCache(os.path.join(self.tmpdir, 'cache'))
+        cache.load(RISRecord, 'test_data/ris/valid.ris')
+        for name, value in (('_python', 'cpython-27'),
+                            ('_format_version', 1)):
+            with self.subTest(name=name), \
+                    mock.patch('refparser.cache.' + name, value), \
+                    mock.patch.object(RISRecord, 'parse',
+                                      return_value=iter(())) as parse:
+                self.assertEqual(cache.load(RISRecord,
+                                            'test_data/ris/valid.ris'), [])
+                parse.assert_called_once()
@@ -0,0 +1,125 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from refparser.cli import main, output_path, convert_file
+from refparser.parsers import RISRecord, MedlineRecord
+
+
+def fingerprints(records):
+    return [(r.location_fingerprint, r.title_authors_fingerprint)
+            for r in records]
+
+
+class TestConvert(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def run_main(self, *argv):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main(list(argv))
+        return status, stderr.getvalue()
+
+    def test_converting_files(self):
+        """
+        Convert files in both directions in parallel and check that the
+        records in the output have the same fingerprints.
+        """
+        conversions = (
+            ('medline', RISRecord, MedlineRecord,
+             ['test_data/ris/valid.ris',
+              'test_data/ris/valid_last_record.ris']),
+            ('ris', MedlineRecord, RISRecord,
+             ['test_data/pubmed/valid.txt',
+              'test_data/pubmed/complex_record.txt']),
+        )
+        for to_format, record_type, output_type, filenames in conversions:
+            with self.subTest(to_format=to_format):
+                status, stderr = self.run_main(
+                    'convert', '--to', to_format, '-d', self.tmpdir,
+                    '-j', '2', *filenames)
+                self.assertEqual(status, 0)
+                for filename in filenames:
+                    destination = output_path(filename, to_format,
+                                              self.tmpdir)
+                    with open(destination, encoding='utf-8') as f:
+                        written = list(output_type.parse(f))
+                    self.assertEqual(
+                        fingerprints(written),
+                        fingerprints(record_type.parse(filename)))
+
+    def test_invalid_files(self):
+        filename = 'test_data/ris/unclosed_last_record.ris'
+        destination = output_path(filename, 'medline', self.tmpdir)
+        status, stderr = self.run_main(
+            'convert', '--to', 'medline', '-d', self.tmpdir, filename)
+        self.assertEqual(status, 1)
+        self.assertIn('line 8', stderr)
+        self.assertFalse(os.path.exists(destination))
+
+        status, stderr = self.run_main(
+            'convert', '--to', 'medline', '-d', self.tmpdir, '--skip-invalid',
+            filename)
+        self.assertEqual(status, 0)
+        self.assertIn('1 invalid records skipped', stderr)
+        with open(destination, encoding='utf-8') as f:
+            self.assertEqual(len(list(MedlineRecord.parse(f))), 1)
+
+    def test_invalid_stdin(self):
+        with open('test_data/ris/unclosed_last_record.ris', 'rb') as f:
+            stdin = io.TextIOWrapper(io.BytesIO(f.read()))
+        with mock.patch('sys.stdin', stdin), \
+                contextlib.redirect_stdout(io.StringIO()):
+            status, stderr = self.run_main('convert', '--to', 'medline', '-')
+        self.assertEqual(status, 1)
+        self.assertIn('refparser: <stdin>: ', stderr)
+        self.assertIn('line 8', stderr)
+
+    def test_unwritable_destination(self):
+        destination = os.path.join(self.tmpdir, 'missing', 'valid.txt')
+        with self.assertRaises(FileNotFoundError) as cm:
+            convert_file('test_data/ris/valid.ris', destination, 'medline')
+        # the error is the one opening the destination, not removing it
+        self.assertIsNone(cm.exception.__context__)
+
+    def test_decoding_files(self):
+        latin1 = os.path.join(self.tmpdir, 'latin1.ris')
+        with open(latin1, 'w', encoding='latin-1') as f:
+            f.write('TY  - JOUR\nTI  - Caf\xe9\nER  - \n')
+        output_dir = os.path.join(self.tmpdir, 'out')
+        filenames = (latin1, 'test_data/ris/valid.ris')
+        status, stderr = self.run_main(
+            'convert', '--to', 'medline', '-d', output_dir, *filenames)
+        self.assertEqual(status, 1)
+        self.assertIn('refparser: {}: '.format(latin1), stderr)
+        # the other file is still converted and reported
+        self.assertIn('test_data/ris/valid.ris: 2 records', stderr)
+
+        status, stderr = self.run_main(
+            'convert', '--to', 'medline', '-d', output_dir, '--encoding',
+            'latin-1', latin1)
+        self.assertEqual(status, 0)
+        with open(output_path(latin1, 'medline', output_dir),
+                  encoding='utf-8') as f:
+            self.assertEqual(next(MedlineRecord.parse(f)).title, 'Caf\xe9')
+
+        status, stderr = self.run_main(
+            'convert', '--to', 'medline', '-d', output_dir,
+            '--encoding-errors', 'replace', latin1)
+        self.assertEqual(status, 0)
+
+    def test_refusing_to_overwrite_input(self):
+        status, stderr = self.run_main(
+            'convert', '--to', 'ris', 'test_data/ris/valid.ris')
+        self.assertEqual(status, 1)
+        self.assertIn('overwritten', stderr)
+
+    def test_output_path(self):
+        self.assertEqual(output_path('a/refs.ris.gz', 'medline'), 'a/refs.txt')
+        self.assertEqual(output_path('refs.txt', 'ris', 'out'),
+                         os.path.join('out', 'refs.ris'))
@@ -0,0 +1,47 @@
+import io
+import gzip
+import unittest
+from refparser.parsers import EndNoteXMLRecord, MedlineRecord
+
+filename = 'test_data/endnote/valid.xml'
+
+
+class TestEndNoteXMLRecord(unittest.TestCase):
+    def test_record_data(self):
+        records = list(EndNoteXMLRecord.parse(filename))
+        self.assertEqual(len(records), 2)
+        record = records[0]
+        self.assertEqual(record.title, 'A systematic review of the safety and '
+                         'efficacy of performing surgery on human subjects '
+                         'by alien surgeons')
+        self.assertEqual(record.authors[2], 'Rodríguez, B. B.')
+        self.assertEqual(record.issn, '9919-991X')
+        self.assertEqual(record.volume, '23119')
+        self.assertEqual(record.issue, '4')
+        self.assertEqual(record.pages, ('370', '4'))
+        self.assertEqual(record.journal_names, {
+            'Journal of earth creatures surgery', 'J Ear Creat Surg'})
+        self.assertEqual(record._first_raw_value('ref-type'),
+                         'Journal Article')
+        self.assertEqual(records[1].pages, (None, None))
+
+    def test_matching_medline_fingerprints(self):
+        record = next(EndNoteXMLRecord.parse(filename))
+        with open('test_data/pubmed/complex_record.txt') as f:
+            medline_record = MedlineRecord(f.read())
+        for name in ('title_authors_fingerprint', 'location_fingerprint'):
+            self.assertEqual(getattr(record, name),
+                             getattr(medline_record, name))
+
+    def test_parsing_sources(self):
+        expected = [list(r.raw_fields())
+                    for r in EndNoteXMLRecord.parse(filename)]
+        with open(filename, 'rb') as f:
+            data = f.read()
+        parsed = (
+            EndNoteXMLRecord.parse(io.BytesIO(gzip.compress(data))),
+            EndNoteXMLRecord.parse_file(filename),
+        )
+        for records in parsed:
+            self.assertEqual([list(r.raw_fields()) for r in records],
+                             expected)
@@ -0,0 +1,99 @@
+import codecs
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from refparser.index import RecordIndex
+from refparser.parsers import RISRecord, MedlineRecord
+
+
+class TestRecordIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def copy_test_data(self, filename):
+        path = os.path.join(self.tmpdir, os.path.basename(filename))
+        shutil.copy('test_data/{}'.format(filename), path)
+        return path
+
+    def test_fetching_records(self):
+        """
+        Fetch records by position and by key and compare them to the records
+        found by parsing the whole file.
+        """
+        files = (
+            ('ris/valid.ris', RISRecord, '654321'),
+            ('pubmed/valid.txt', MedlineRecord, '654321'),
+        )
+        for filename, record_type, key in files:
+            with self.subTest(filename=filename, record_type=record_type):
+                path = self.copy_test_data(filename)
+                with open(path, 'r') as data_file:
+                    records = list(record_type.parse(data_file))
+                self.assertEqual(
+                    record_type.fetch(path, 1)._raw_data,
+                    records[1]._raw_data)
+                self.assertTrue(os.path.exists(path + '.idx'))
+                self.assertEqual(
+                    record_type.fetch(path, key=key)._raw_data,
+                    records[1]._raw_data)
+                with self.assertRaises(IndexError):
+                    record_type.fetch(path, len(records))
+
+    def test_fetching_without_a_position_or_key(self):
+        path = self.copy_test_data('ris/valid.ris')
+        for kwargs in ({}, {'position': 0, 'key': '654321'}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    RISRecord.fetch(path, **kwargs)
+
+    def test_reusing_loaded_indexes(self):
+        """
+        Fetch records twice and check that the sidecar file is only read the
+        first time, until the file changes.
+        """
+        path = self.copy_test_data('ris/valid.ris')
+        RecordIndex.build(RISRecord, path).save(path + '.idx')
+        with mock.patch.object(RecordIndex, 'load',
+                               wraps=RecordIndex.load) as load:
+            RISRecord.fetch(path, 0)
+            RISRecord.fetch(path, key='654321')
+            self.assertEqual(load.call_count, 1)
+            with open(path, 'a') as f:
+                f.write('TY  - JOUR\nID  - 999\nER  - \n')
+            self.assertEqual(RISRecord.fetch(path, 2)._raw_data,
+                             'TY  - JOUR\nID  - 999\nER  - \n')
+            self.assertEqual(load.call_count, 2)
+
+    def test_saving_and_loading(self):
+        path = self.copy_test_data('ris/valid.ris')
+        index = RecordIndex.build(RISRecord, path)
+        index.save(path + '.idx')
+        loaded = RecordIndex.load(path + '.idx')
+        self.assertEqual(list(loaded.offsets), list(index.offsets))
+        self.assertEqual(loaded.keys, {'123456': 0, '654321': 1})
+        self.assertTrue(loaded.is_current(RISRecord, path))
+        self.assertFalse(loaded.is_current(MedlineRecord, path))
+
+    def test_stale_index_is_rebuilt(self):
+        path = self.copy_test_data('ris/valid.ris')
+        RecordIndex.for_file(RISRecord, path)
+        with open(path, 'a') as f:
+            f.write('TY  - JOUR\nID  - 999\nER  - \n')
+        self.assertEqual(RISRecord.fetch(path, key='999')._raw_data,
+                         'TY  - JOUR\nID  - 999\nER  - \n')
+
+    def test_file_with_byte_order_mark(self):
+        path = os.path.join(self.tmpdir, 'bom.ris')
+        with open('test_data/ris/valid.ris', 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(codecs.BOM_UTF8 + data)
+        records = list(RISRecord.parse_file(path))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(RISRecord.fetch(path, 0)._raw_data,
+                         records[0]._raw_data)
+        self.assertEqual(RISRecord.fetch(path, key='654321')._raw_data,
+                         records[1]._raw_data)
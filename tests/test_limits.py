@@ -0,0 +1,147 @@
+import io
+import itertools
+import unittest
+from refparser.exceptions import ReferenceSizeError, ReferenceSyntaxError
+from refparser.limits import SizeLimits
+from refparser.parsers import RISRecord, MedlineRecord, BibTeXRecord, \
+    PubmedXMLRecord, IncrementalParser, parse_any
+
+
+class TestSizeLimits(unittest.TestCase):
+    def test_parsing_within_limits(self):
+        limits = SizeLimits(record=1 << 20, field=1 << 16,
+                            continuation=1 << 16)
+        files = (
+            ('test_data/ris/valid.ris', RISRecord),
+            ('test_data/pubmed/valid.txt', MedlineRecord),
+            ('test_data/pubmed/complex_record.txt', MedlineRecord),
+            ('test_data/bibtex/valid.bib', BibTeXRecord),
+        )
+        for filename, record_type in files:
+            with self.subTest(filename=filename):
+                expected = [r._raw_data for r in record_type.parse(filename)]
+                parsed = [r._raw_data
+                          for r in record_type.parse(filename, limits=limits)]
+                self.assertEqual(parsed, expected)
+
+    def test_stopping_at_the_record_limit(self):
+        """
+        Parse endless records that are never closed and check that parsing
+        stops as soon as the record limit is passed.
+        """
+        endless_records = (
+            (RISRecord, itertools.chain(
+                ['TY  - JOUR\n'], itertools.repeat('N1  - note\n'))),
+            (MedlineRecord, itertools.chain(
+                ['PMID- 1\n'], itertools.repeat('AB  - text\n'))),
+            (BibTeXRecord, itertools.chain(
+                ['@article{a,\n'], itertools.repeat('note = {a\n'))),
+        )
+        for record_type, lines in endless_records:
+            with self.subTest(record_type=record_type):
+                with self.assertRaises(ReferenceSizeError) as cm:
+                    list(record_type.parse(lines,
+                                           limits=SizeLimits(record=1000)))
+                self.assertEqual(cm.exception.line_number, 1)
+                self.assertIsInstance(cm.exception, ReferenceSyntaxError)
+
+    def test_field_limits(self):
+        long_abstract = 'PMID- 1\nAB  - start\n' + '      more\n' * 100
+        cases = (
+            (SizeLimits(field=500), 'field larger than 500'),
+            (SizeLimits(continuation=500),
+             'continuation lines larger than 500'),
+        )
+        for limits, reason in cases:
+            with self.subTest(reason=reason):
+                with self.assertRaises(ReferenceSizeError) as cm:
+                    list(MedlineRecord.parse(io.StringIO(long_abstract),
+                                             limits=limits))
+                self.assertEqual(cm.exception.reason, reason)
+        lines = ['TY  - JOUR\n', 'AB  - ' + 'x' * 1000 + '\n', 'ER  - \n']
+        with self.assertRaises(ReferenceSizeError):
+            list(RISRecord.parse(lines, limits=SizeLimits(field=500)))
+
+    def test_skipping_oversized_records(self):
+        data = (
+            'TY  - JOUR\nTI  - Kept\nER  - \n'
+            'TY  - JOUR\nAB  - ' + 'x' * 1000 + '\nER  - \n'
+            'TY  - JOUR\nTI  - Also kept\nER  - \n'
+        )
+        errors = []
+        records = RISRecord.parse(io.StringIO(data), errors,
+                                  limits=SizeLimits(record=500))
+        self.assertEqual([r.title for r in records], ['Kept', 'Also kept'])
+        self.assertEqual([(e.reason, e.line_number) for e in errors],
+                         [('record larger than 500', 4)])
+
+        data = data.replace('TY  - JOUR\n', 'PMID- 1\n') \
+            .replace('ER  - \n', '\n')
+        errors = []
+        records = MedlineRecord.parse(io.StringIO(data), errors,
+                                      limits=SizeLimits(record=500))
+        self.assertEqual([r.title for r in records], ['Kept', 'Also kept'])
+        self.assertEqual(len(errors), 1)
+
+    def test_incremental_parsing(self):
+        limits = SizeLimits(record=1000)
+        parser = IncrementalParser(MedlineRecord, limits=limits)
+        records = parser.feed(b'PMID- 1\nTI  - Title\n\n')
+        self.assertEqual([r.title for r in records], ['Title'])
+        with self.assertRaises(ReferenceSizeError) as cm:
+            for i in range(100):
+                parser.feed(b'PMID- 2\nAB  - text without blank lines\n')
+        self.assertLess(i, 50)
+        self.assertEqual(cm.exception.offset, 20)
+
+        # the record is dropped and parsing resumes at the next one
+        for i in range(50):
+            self.assertEqual(parser.feed(b'AB  - more text\n'), [])
+        self.assertLessEqual(len(parser._buffer), 1000)
+        records = parser.feed(b'\nPMID- 3\nTI  - After\n\n')
+        self.assertEqual([r.title for r in records + parser.close()],
+                         ['After'])
+
+        parser = IncrementalParser(RISRecord, limits=SizeLimits(field=100))
+        with self.assertRaises(ReferenceSizeError):
+            parser.feed(b'TY  - JOUR\nAB  - ' + b'x' * 200 + b'\nER  - \n')
+
+    def test_reading_long_lines(self):
+        """
+        Parse a line that never ends and check that no more than the record
+        limit is read from it at once.
+        """
+        class File(io.StringIO):
+            longest = 0
+
+            def readline(self, size=-1):
+                line = super().readline(size)
+                File.longest = max(File.longest, len(line))
+                return line
+
+        for parse in (RISRecord.parse, parse_any):
+            with self.subTest(parse=parse):
+                File.longest = 0
+                data = File('TY  - JOUR\nAB  - ' + 'x' * 100000)
+                with self.assertRaises(ReferenceSizeError):
+                    list(parse(data, limits=SizeLimits(record=1000)))
+                self.assertLessEqual(File.longest, 1001)
+
+    def test_xml_record_limit(self):
+        with open('test_data/pubmed/valid.xml', 'rb') as f:
+            data = f.read()
+        large = data.replace(b'</PubmedArticle>',
+                             b'<Note>' + b'x' * 100000 + b'</Note>'
+                             b'</PubmedArticle>', 1)
+        limits = SizeLimits(record=10000)
+        self.assertEqual(
+            len(list(PubmedXMLRecord.parse(io.BytesIO(data), limits=limits))),
+            2)
+        with self.assertRaises(ReferenceSizeError):
+            list(PubmedXMLRecord.parse(io.BytesIO(large), limits=limits))
+        with self.assertRaises(ReferenceSizeError):
+            list(parse_any(io.BytesIO(large), limits=limits))
+        errors = []
+        list(PubmedXMLRecord.parse(io.BytesIO(large), errors, limits=limits))
+        self.assertEqual([e.reason for e in errors],
+                         ['record larger than 10000'])
@@ -0,0 +1,33 @@
+import io
+import unittest
+from refparser.matching import all_matches
+from refparser.parsers import RISRecord, MedlineRecord
+from refparser.writers import MedlineWriter
+
+
+class TestAllMatches(unittest.TestCase):
+    def test_matching_converted_records(self):
+        records = list(RISRecord.parse('test_data/ris/valid.ris'))
+        f = io.StringIO()
+        with MedlineWriter(f) as writer:
+            writer.write_all(records)
+        f.seek(0)
+        converted = list(MedlineRecord.parse(f))
+        matches = list(all_matches(records, converted))
+        self.assertEqual(
+            [(record.title, match.title) for record, match in matches],
+            [(record.title, record.title) for record in records
+             if record.location_fingerprint or
+             record.title_authors_fingerprint])
+
+    def test_matching_each_record_once(self):
+        """
+        Match a record without a location fingerprint twice, which used to
+        leave it in the title and authors index after its first match.
+        """
+        record = RISRecord(
+            'TY  - JOUR\nTI  - Title\nAU  - Cushing, Harvey\nER  - \n')
+        self.assertIsNone(record.location_fingerprint)
+        matches = list(all_matches([record], [record, RISRecord(
+            record._raw_data)]))
+        self.assertEqual(len(matches), 1)
@@ -1,6 +1,18 @@
+import asyncio
+import codecs
+import io
+import os
+import shutil
+import sys
+import tempfile
 import unittest
-from refparser.parsers import RISRecord, MedlineRecord
-from refparser.exceptions import ReferenceSyntaxError
+from unittest import mock
+from refparser.parsers import RISRecord, MedlineRecord, CompactRISRecord, \
+    CompactMedlineRecord, IncrementalParser, PubmedXMLRecord, \
+    EndNoteXMLRecord, BibTeXRecord
+from refparser.parsers import detect_format, parse_any, parse_many
+from refparser.exceptions import ReferenceSyntaxError, UnknownReferenceFormat
+from refparser.utils import cached_slot
 
 
 class TestParsers(unittest.TestCase):
@@ -49,6 +61,328 @@ class TestParsers(unittest.TestCase):
                             self.assertEqual(exp_record,
                                              parsed_record._raw_data)
 
+    def test_parsing_mapped_files(self):
+        """
+        Parse files through the memory-mapped scanner and compare the records
+        to the ones produced by parsing the same files line by line.
+        """
+        records_files = (
+            ('test_data/ris/valid.ris', RISRecord),
+            ('test_data/ris/valid_last_record.ris', RISRecord),
+            ('test_data/pubmed/valid.txt', MedlineRecord),
+            ('test_data/pubmed/complex_record.txt', MedlineRecord),
+        )
+        for data_fn, record_type in records_files:
+            with self.subTest(data_fn=data_fn, record_type=record_type):
+                with open(data_fn, 'r') as data_file:
+                    expected = [r._raw_data for r in
+                                record_type.parse(data_file)]
+                parsed = [r._raw_data for r in record_type.parse_file(data_fn)]
+                self.assertEqual(parsed, expected)
+
+    def test_parsing_in_parallel(self):
+        records_files = (
+            ('test_data/ris/valid.ris', RISRecord),
+            ('test_data/pubmed/valid.txt', MedlineRecord),
+        )
+        for data_fn, record_type in records_files:
+            with self.subTest(data_fn=data_fn, record_type=record_type):
+                with open(data_fn, 'r') as data_file:
+                    expected = [r._raw_data for r in
+                                record_type.parse(data_file)]
+                parsed = [r._raw_data for r in
+                          record_type.parse_parallel(data_fn, workers=2)]
+                self.assertEqual(parsed, expected)
+
+    def test_parsing_in_parallel_after_byte_order_mark(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'bom.ris')
+        with open('test_data/ris/valid.ris', 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(codecs.BOM_UTF8 + data)
+        expected = [r._raw_data for r in RISRecord.parse_file(path)]
+        self.assertEqual(len(expected), 2)
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                parsed = [r._raw_data for r in
+                          RISRecord.parse_parallel(path, workers=workers)]
+                self.assertEqual(parsed, expected)
+
+    def test_parsing_batches(self):
+        with open('test_data/pubmed/valid.txt', 'r') as data_file:
+            batches = list(MedlineRecord.parse_batches(data_file,
+                                                       batch_size=1))
+        self.assertEqual([len(batch) for batch in batches], [1, 1])
+        self.assertEqual(batches[0].pages, [(None, None)])
+        self.assertEqual(batches[1].location_fingerprint, [None])
+
+        with open('test_data/pubmed/complex_record.txt', 'r') as data_file:
+            batch, = MedlineRecord.parse_batches(data_file)
+        self.assertEqual(next(batch.rows()), {
+            'title': self.complex_medline_record.title,
+            'authors': self.complex_medline_record.authors,
+            'issn': '9919-991X',
+            'volume': '23119',
+            'issue': '4',
+            'pages': ('370', '4'),
+            'location_fingerprint': '370-374$23119$4$9919-991X',
+            'title_authors_fingerprint':
+                self.complex_medline_record.title_authors_fingerprint,
+        })
+
+    def test_parsing_async_streams(self):
+        """
+        Feed files in small chunks to the async parser, both as an async
+        iterable and through an asyncio.StreamReader, and compare the
+        records to the ones parsed from the files line by line.
+        """
+        async def chunks(data, size):
+            for i in range(0, len(data), size):
+                yield data[i:i + size]
+
+        async def parse_stream(record_type, data):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return [r._raw_data async for r in record_type.aparse(reader)]
+
+        async def parse_chunks(record_type, data, size):
+            return [r._raw_data async for r in
+                    record_type.aparse(chunks(data, size))]
+
+        records_files = (
+            ('test_data/ris/valid.ris', RISRecord),
+            ('test_data/pubmed/valid.txt', MedlineRecord),
+            ('test_data/pubmed/complex_record.txt', MedlineRecord),
+        )
+        for data_fn, record_type in records_files:
+            with self.subTest(data_fn=data_fn, record_type=record_type):
+                with open(data_fn, 'r') as data_file:
+                    expected = [r._raw_data for r in
+                                record_type.parse(data_file)]
+                with open(data_fn, 'rb') as data_file:
+                    data = data_file.read()
+                self.assertEqual(
+                    asyncio.run(parse_stream(record_type, data)), expected)
+                for size in (1, 7, 64):
+                    self.assertEqual(
+                        asyncio.run(parse_chunks(record_type, data, size)),
+                        expected)
+
+    def test_incremental_parsing(self):
+        with open('test_data/ris/valid.ris', 'r') as data_file:
+            expected = [r._raw_data for r in RISRecord.parse(data_file)]
+        with open('test_data/ris/valid.ris', 'rb') as data_file:
+            data = data_file.read()
+
+        parser = IncrementalParser(RISRecord)
+        parsed = []
+        for i in range(len(data)):
+            parsed += [r._raw_data for r in parser.feed(data[i:i + 1])]
+            if len(parsed) == 1:
+                # only the data after the first record is buffered
+                self.assertEqual(parser.offset, len(expected[0]))
+        parsed += [r._raw_data for r in parser.close()]
+        self.assertEqual(parsed, expected)
+
+        with open('test_data/ris/unclosed_last_record.ris', 'rb') as f:
+            parser = IncrementalParser(RISRecord)
+            self.assertEqual(len(parser.feed(f.read())), 1)
+            with self.assertRaises(ReferenceSyntaxError):
+                parser.close()
+
+    def test_incremental_parsing_after_errors(self):
+        with open('test_data/ris/unopened_last_record.ris', 'rb') as f:
+            data = f.read()
+        parser = IncrementalParser(RISRecord)
+        with self.assertRaises(ReferenceSyntaxError):
+            parser.feed(data)
+        # the record before the error is kept and the error isn't repeated
+        parsed = parser.feed(b'TY  - JOUR\nID  - 789012\nER  - \n')
+        parsed += parser.close()
+        self.assertEqual([r._first_raw_value('ID') for r in parsed],
+                         ['123456', '789012'])
+
+    def test_incremental_parsing_large_records(self):
+        """
+        Feed a large record of each format in many small chunks and check
+        that its buffer is only split again once its end may have arrived.
+        """
+        line = 'x' * 60
+        records = (
+            (RISRecord, 'TY  - JOUR\n' + 'AB  - {}\n'.format(line) * 2000 +
+             'ER  - \n'),
+            (MedlineRecord, 'PMID- 1\n' + 'AB  - {}\n'.format(line) * 2000 +
+             '\n'),
+            (PubmedXMLRecord, '<PubmedArticleSet><PubmedArticle>' +
+             '<a>{}</a>\n'.format(line) * 2000 +
+             '</PubmedArticle></PubmedArticleSet>\n'),
+            (BibTeXRecord, '@article{key,\n' +
+             '  note = {{{}}},\n'.format(line) * 2000 + '}\n'),
+        )
+        for record_type, data in records:
+            with self.subTest(record_type=record_type):
+                data = data.encode('utf-8')
+                parser = IncrementalParser(record_type)
+                parsed = []
+                with mock.patch.object(
+                        record_type, 'split_buffer',
+                        wraps=record_type.split_buffer) as split_buffer:
+                    for i in range(0, len(data), 100):
+                        parsed += parser.feed(data[i:i + 100])
+                    parsed += parser.close()
+                self.assertEqual(len(parsed), 1)
+                self.assertGreater(len(parsed[0]._raw_data),
+                                   len(line) * 2000)
+                self.assertLessEqual(split_buffer.call_count, 3)
+
+    def test_incremental_parsing_error_positions(self):
+        path = 'test_data/ris/unopened_last_record.ris'
+        with self.assertRaises(ReferenceSyntaxError) as expected:
+            list(RISRecord.parse(path))
+        with open(path, 'rb') as f:
+            data = f.read()
+        for chunk_size in (1, 30, 52, len(data)):
+            with self.subTest(chunk_size=chunk_size):
+                parser = IncrementalParser(RISRecord)
+                with self.assertRaises(ReferenceSyntaxError) as cm:
+                    for i in range(0, len(data), chunk_size):
+                        parser.feed(data[i:i + chunk_size])
+                    parser.close()
+                self.assertEqual(
+                    (cm.exception.line_number, cm.exception.offset),
+                    (expected.exception.line_number,
+                     expected.exception.offset))
+
+    def test_error_offsets_in_bytes(self):
+        """
+        Parse non-ASCII data with a byte order mark and CRLF line endings
+        through every entry point and check that they all report the byte
+        offset of the unclosed record.
+        """
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'crlf.ris')
+        with open('test_data/ris/unclosed_last_record.ris', 'rb') as f:
+            data = codecs.BOM_UTF8 + f.read().replace(
+                b'Cushing', 'Cüshing'.encode('utf-8')).replace(b'\n', b'\r\n')
+        with open(path, 'wb') as f:
+            f.write(data)
+        offset = data.rindex(b'TY  - ')
+
+        def parse_incrementally(errors):
+            parser = IncrementalParser(RISRecord)
+            try:
+                parser.feed(data)
+                parser.close()
+            except ReferenceSyntaxError as e:
+                errors.append(e)
+
+        async def chunks():
+            yield data
+
+        async def parse_stream(errors):
+            try:
+                async for _ in RISRecord.aparse(chunks()):
+                    pass
+            except ReferenceSyntaxError as e:
+                errors.append(e)
+
+        entry_points = (
+            ('parse', lambda errors: list(RISRecord.parse(path, errors))),
+            ('parse binary file', lambda errors: list(
+                RISRecord.parse(io.BytesIO(data), errors))),
+            ('parse_any', lambda errors: list(parse_any(path, errors=errors))),
+            ('parse_file', lambda errors: list(
+                RISRecord.parse_file(path, errors))),
+            ('IncrementalParser', parse_incrementally),
+            ('aparse', lambda errors: asyncio.run(parse_stream(errors))),
+        )
+        for name, parse in entry_points:
+            with self.subTest(entry_point=name):
+                errors = []
+                parse(errors)
+                self.assertEqual(
+                    [(e.line_number, e.offset) for e in errors],
+                    [(8, offset)])
+
+    def test_detecting_formats(self):
+        cases = (
+            ('TY  - JOUR\nER  - \n', RISRecord),
+            ('Data in between\n\nTY  - JOUR\n', RISRecord),
+            ('\ufeffTY  - JOUR\n', RISRecord),
+            ('\nPMID- 123456\nOWN - NLM\n', MedlineRecord),
+            (b'PMID- 123456\n', MedlineRecord),
+            ('<?xml version="1.0"?>\n<PubmedArticleSet>\n', PubmedXMLRecord),
+            ('<?xml version="1.0"?><xml><records><record>',
+             EndNoteXMLRecord),
+            ('% a comment\n@article{key,\n  title = {T}\n}\n',
+             BibTeXRecord),
+            ('TY  - JOUR\nAB  - See <xml><records>\n', RISRecord),
+        )
+        for sample, expected in cases:
+            with self.subTest(sample=sample):
+                self.assertIs(detect_format(sample), expected)
+        with self.assertRaises(UnknownReferenceFormat):
+            detect_format('<?xml version="1.0"?>\n')
+
+    def test_parsing_any_format(self):
+        for data_fn, record_type in (('test_data/ris/valid.ris', RISRecord),
+                                     ('test_data/pubmed/valid.txt',
+                                      MedlineRecord)):
+            with self.subTest(data_fn=data_fn):
+                with open(data_fn, 'r') as data_file:
+                    expected = [r._raw_data for r in
+                                record_type.parse(data_file)]
+                with open(data_fn, 'r') as data_file:
+                    parsed = list(parse_any(data_file, sample_size=16))
+                self.assertTrue(all(type(r) is record_type for r in parsed))
+                self.assertEqual([r._raw_data for r in parsed], expected)
+
+    def test_parsing_many_files(self):
+        """
+        Parse several files of different formats concurrently and check that
+        the records are tagged with their files and in the files' order.
+        """
+        paths = ['test_data/ris/valid.ris', 'test_data/pubmed/valid.txt',
+                 'test_data/pubmed/complex_record.txt',
+                 'test_data/pubmed/valid.xml', 'test_data/endnote/valid.xml',
+                 'test_data/bibtex/valid.bib', 'test_data/ris/valid.ris']
+        expected = []
+        for path in paths:
+            with open(path, 'r') as data_file:
+                expected += [(path, r._raw_data)
+                             for r in parse_any(data_file)]
+        gil_checks = (
+            ('GIL', lambda: True),
+            ('free-threaded', lambda: False),
+        )
+        for name, is_gil_enabled in gil_checks:
+            with self.subTest(name=name), mock.patch.object(
+                    sys, '_is_gil_enabled', is_gil_enabled, create=True):
+                parsed = [(path, r._raw_data)
+                          for path, r in parse_many(paths, workers=2)]
+                self.assertEqual(parsed, expected)
+
+        parsed = parse_many(paths[:1], workers=1, record_type=RISRecord)
+        self.assertTrue(all(type(r) is RISRecord for path, r in parsed))
+
+    def test_parsing_invalid_mapped_files(self):
+        invalid_files = (
+            ('ris/unclosed_first_record.ris', RISRecord),
+            ('ris/unclosed_last_record.ris', RISRecord),
+            ('ris/unopened_first_record.ris', RISRecord),
+            ('ris/unopened_last_record.ris', RISRecord),
+        )
+        for filename, record_type in invalid_files:
+            with self.subTest(filename=filename, record_type=record_type):
+                with self.assertRaises(ReferenceSyntaxError):
+                    for _ in record_type.parse_file(
+                            'test_data/{}'.format(filename)):
+                        pass
+
     def test_parsing_invalid_files(self):
         """
         Try to parse the records of invalid files and assert that they
@@ -67,6 +401,30 @@ class TestParsers(unittest.TestCase):
                         for _ in record_type.parse(data_file):
                             pass
 
+    def test_recovering_from_invalid_records(self):
+        """
+        Parse invalid files collecting the errors instead of raising them and
+        check that the valid records are still parsed and the errors point at
+        the invalid records.
+        """
+        invalid_files = (
+            ('ris/unclosed_first_record.ris', ['654321'], 1, 0),
+            ('ris/unclosed_last_record.ris', ['123456'], 8, 71),
+            ('ris/unopened_first_record.ris', ['654321'], 3, 35),
+            ('ris/unopened_last_record.ris', ['123456'], 10, 108),
+        )
+        for filename, ids, line_number, offset in invalid_files:
+            path = 'test_data/{}'.format(filename)
+            for parse in (RISRecord.parse, RISRecord.parse_file):
+                with self.subTest(filename=filename, parse=parse.__name__):
+                    errors = []
+                    records = list(parse(path, errors=errors))
+                    self.assertEqual(
+                        [r._first_raw_value('ID') for r in records], ids)
+                    self.assertEqual(len(errors), 1)
+                    self.assertEqual(errors[0].line_number, line_number)
+                    self.assertEqual(errors[0].offset, offset)
+
     def test_parsing_fields(self):
         """
         Get the raw data of the first record from each file then parse that
@@ -100,6 +458,77 @@ class TestParsers(unittest.TestCase):
                 parsed_fields = list(first_record.raw_fields())
                 self.assertEqual(parsed_fields, expected_fields)
 
+    def test_tokenizing_fields(self):
+        """
+        Tokenize records with padded values, lines that aren't fields and
+        continuation lines, and check the tokens and values of their fields.
+        """
+        record = RISRecord(
+            'TY  - JOUR\nAU  - Cushing, Harvey  \nnot a field\n'
+            'AU  -   Hashimoto, Hakaru\nN1  - \nER  - \n')
+        self.assertEqual(record._raw_field_tokens, {
+            'TY': ['JOUR'],
+            'AU': ['Cushing, Harvey', 'Hashimoto, Hakaru'],
+            'N1': [''],
+            'ER': [''],
+        })
+        self.assertEqual(list(record.raw_fields()), [
+            ('TY', 'JOUR'), ('AU', 'Cushing, Harvey'),
+            ('AU', 'Hashimoto, Hakaru'), ('N1', ''), ('ER', '')])
+
+        record = MedlineRecord(
+            'PMID- 1\nTI  - A title that\n      continues \n'
+            'FAU - Cushing, Harvey\n    - not a field\n      dropped\n'
+            'AU  - Cushing H\n')
+        self.assertEqual(record._raw_field_tokens, {
+            'PMID': ['1'],
+            'TI': ['A title that\n      continues '],
+            'FAU': ['Cushing, Harvey'],
+            'AU': ['Cushing H'],
+        })
+        self.assertEqual(list(record.raw_fields()), [
+            ('PMID', '1'), ('TI', 'A title that\ncontinues'),
+            ('FAU', 'Cushing, Harvey'), ('AU', 'Cushing H')])
+
+    def test_parsing_projected_fields(self):
+        """
+        Parse records keeping only a few fields and check that the other
+        fields, including multi-line ones, are dropped.
+        """
+        records_files = (
+            ('test_data/ris/valid.ris', RISRecord, ('ID',),
+                [('TY', 'JOUR'), ('ID', '123456'), ('ER', '')]),
+            ('test_data/pubmed/valid.txt', MedlineRecord, ('PMID', 'STAT'),
+                [('PMID', '123456'), ('STAT', 'Publisher')]),
+        )
+        for filename, record_type, fields, expected_fields in records_files:
+            with self.subTest(filename=filename, record_type=record_type):
+                records = list(record_type.parse(filename, fields=fields))
+                self.assertEqual(len(records), 2)
+                self.assertEqual(list(records[0].raw_fields()),
+                                 expected_fields)
+                with open(filename, 'rb') as f:
+                    data = f.read()
+                parser = IncrementalParser(record_type, fields=fields)
+
+                async def parse_stream():
+                    reader = asyncio.StreamReader()
+                    reader.feed_data(data)
+                    reader.feed_eof()
+                    return [r async for r in record_type.aparse(
+                        reader, fields=fields)]
+
+                parsed = (
+                    record_type.parse_file(filename, fields=fields),
+                    record_type.parse_parallel(filename, workers=2,
+                                               fields=fields),
+                    parser.feed(data) + parser.close(),
+                    asyncio.run(parse_stream()),
+                )
+                for other_records in parsed:
+                    self.assertEqual([r._raw_data for r in other_records],
+                                     [r._raw_data for r in records])
+
     def test_all_raw_values(self):
         self.assertEqual(
             self.complex_ris_record._all_raw_values('AU', 'A1'),
@@ -212,6 +641,29 @@ safety of this practice are lacking. More research in this area is needed."""),
 
         self.assertEqual(record_values, expected_values)
 
+    def test_compact_records(self):
+        """
+        Compare the properties of compact records to those of the regular
+        records built from the same raw data.
+        """
+        properties = ('title', 'abstract', 'authors', 'journal_names', 'issn',
+                      'volume', 'issue', 'pages', 'location_fingerprint',
+                      'title_authors_fingerprint')
+        for r, compact_type in ((self.complex_ris_record, CompactRISRecord),
+                                (self.complex_medline_record,
+                                 CompactMedlineRecord)):
+            with self.subTest(record_type=type(r).__name__):
+                compact = compact_type(r._raw_data)
+                self.assertFalse(hasattr(compact, '__dict__'))
+                for name in properties:
+                    self.assertEqual(getattr(compact, name),
+                                     getattr(r, name))
+                # the properties don't keep the tokens of every field
+                self.assertFalse(hasattr(compact, cached_slot.slot_name(
+                    '_raw_field_tokens')))
+                self.assertEqual(compact._raw_field_tokens,
+                                 r._raw_field_tokens)
+
     def test_ris_record_location_fingerprint(self):
         for r in (self.complex_ris_record, self.complex_medline_record):
             with self.subTest(record_type=type(r).__name__):
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import io
+import tracemalloc
+import unittest
+from refparser.parsers import PubmedXMLRecord, MedlineRecord
+from refparser.exceptions import ReferenceSyntaxError
+
+filename = 'test_data/pubmed/valid.xml'
+
+
+def article_set(count):
+    with open(filename, 'rb') as f:
+        data = f.read()
+    start = data.index(b'<PubmedArticle>')
+    end = data.index(b'</PubmedArticle>') + len(b'</PubmedArticle>')
+    return b''.join([data[:start], data[start:end] * count, data[end:]])
+
+
+class TestPubmedXMLRecord(unittest.TestCase):
+    def test_record_data(self):
+        records = list(PubmedXMLRecord.parse(filename))
+        self.assertEqual(len(records), 2)
+        record = records[1]
+        self.assertEqual(record.title, 'Writing examples & test data.')
+        self.assertEqual(record.authors, ['Cushing, Harvey'])
+        self.assertEqual(record.issn, '1234-5678')
+        self.assertEqual(record.volume, '12')
+        self.assertEqual(record.issue, None)
+        self.assertEqual(record.pages, ('e101', 'e109'))
+        self.assertEqual(record.journal_names, {'Journal of examples', 'J Ex'})
+        self.assertEqual(record._first_raw_value('CN'), 'Example Study Group')
+        self.assertTrue(record._raw_data.startswith('<PubmedArticle>'))
+
+    def test_matching_medline_fingerprints(self):
+        """
+        Check that an article parsed from XML has the same fingerprints as the
+        same article parsed from Medline.
+        """
+        record = next(PubmedXMLRecord.parse(filename))
+        with open('test_data/pubmed/complex_record.txt') as f:
+            medline_record = MedlineRecord(f.read())
+        for name in ('title_authors_fingerprint', 'location_fingerprint'):
+            self.assertEqual(getattr(record, name),
+                             getattr(medline_record, name))
+
+    def test_parsing_sources(self):
+        """
+        Parse the file as a path, a compressed file object, a memory map and
+        an async stream, and check that the records are the same.
+        """
+        expected = [list(r.raw_fields())
+                    for r in PubmedXMLRecord.parse(filename)]
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        async def parse_stream():
+            async def chunks():
+                for i in range(0, len(data), 100):
+                    yield data[i:i + 100]
+            return [r async for r in PubmedXMLRecord.aparse(chunks())]
+
+        parsed = (
+            PubmedXMLRecord.parse(io.BytesIO(gzip.compress(data))),
+            PubmedXMLRecord.parse_file(filename),
+            asyncio.run(parse_stream()),
+        )
+        for records in parsed:
+            self.assertEqual([list(r.raw_fields()) for r in records],
+                             expected)
+
+    def test_parsing_fields(self):
+        for records in (
+                PubmedXMLRecord.parse(filename, fields=('TI', 'FAU')),
+                PubmedXMLRecord.parse_file(filename, fields=('TI', 'FAU'))):
+            self.assertEqual(
+                [field for field, value in next(records).raw_fields()],
+                ['TI'] + ['FAU'] * 5)
+
+    def test_parsing_encodings(self):
+        """
+        Parse Latin-1 data in XML without an encoding declaration, which is
+        read as UTF-8 unless the encoding is passed.
+        """
+        with open(filename, 'rb') as f:
+            data = f.read().replace(b'Cushing', b'C\xfcshing')
+        with self.assertRaises(ReferenceSyntaxError):
+            list(PubmedXMLRecord.parse(io.BytesIO(data)))
+        records = list(PubmedXMLRecord.parse(io.BytesIO(data),
+                                             encoding='latin-1'))
+        self.assertEqual(records[1].authors, ['C\xfcshing, Harvey'])
+        records = list(PubmedXMLRecord.parse(io.BytesIO(data),
+                                             encoding='utf-8',
+                                             encoding_errors='replace'))
+        self.assertEqual(records[1].authors, ['C\ufffdshing, Harvey'])
+        with self.assertRaises(ValueError):
+            list(PubmedXMLRecord.parse(io.BytesIO(data),
+                                       encoding_errors='replace'))
+
+    def test_parsing_invalid_files(self):
+        data = article_set(2)[:-100]
+        with self.assertRaises(ReferenceSyntaxError):
+            list(PubmedXMLRecord.parse(io.BytesIO(data)))
+
+        errors = []
+        records = list(PubmedXMLRecord.parse(io.BytesIO(data), errors))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(len(errors), 1)
+
+        with self.assertRaises(ReferenceSyntaxError):
+            list(PubmedXMLRecord.split_buffer(data))
+
+    def test_constant_memory(self):
+        """
+        Parse files of different sizes and check that the peak memory use
+        doesn't grow with the number of articles.
+        """
+        def peak_memory(data):
+            tracemalloc.start()
+            try:
+                for record in PubmedXMLRecord.parse(io.BytesIO(data)):
+                    record.title_authors_fingerprint
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small = peak_memory(article_set(100))
+        large = peak_memory(article_set(600))
+        self.assertLess(large, small * 1.5)
@@ -0,0 +1,131 @@
+import asyncio
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from refparser.parsers import RISRecord, MedlineRecord, IncrementalParser, \
+    parse_any
+from refparser.sources import compression
+
+
+class TestSources(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        with open('test_data/ris/valid.ris', 'rb') as f:
+            self.data = f.read()
+        with open('test_data/ris/valid.ris', 'r') as f:
+            self.expected = [r._raw_data for r in RISRecord.parse(f)]
+
+    def write(self, filename, data):
+        path = os.path.join(self.tmpdir, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def compressed_files(self):
+        zipped = io.BytesIO()
+        with zipfile.ZipFile(zipped, 'w') as archive:
+            archive.writestr('valid.ris', self.data)
+        return (
+            ('gzip', self.write('valid.ris.gz', gzip.compress(self.data))),
+            ('bz2', self.write('valid.ris.bz2', bz2.compress(self.data))),
+            ('xz', self.write('valid.ris.xz', lzma.compress(self.data))),
+            ('zip', self.write('valid.zip', zipped.getvalue())),
+        )
+
+    def test_parsing_compressed_files(self):
+        """
+        Parse compressed files through each of the entry points, passing both
+        paths and binary file objects, and compare the records to the ones
+        parsed from the uncompressed file.
+        """
+        for kind, path in self.compressed_files():
+            with self.subTest(kind=kind):
+                with open(path, 'rb') as f:
+                    self.assertEqual(compression(f), kind)
+                    parsed = [r._raw_data for r in RISRecord.parse(f)]
+                    self.assertFalse(f.closed)
+                self.assertEqual(parsed, self.expected)
+                for parse in (RISRecord.parse, RISRecord.parse_file,
+                              parse_any):
+                    self.assertEqual([r._raw_data for r in parse(path)],
+                                     self.expected)
+
+    def test_parsing_zip_members(self):
+        with open('test_data/pubmed/valid.txt', 'rb') as f:
+            medline_data = f.read()
+        zipped = io.BytesIO()
+        with zipfile.ZipFile(zipped, 'w') as archive:
+            archive.writestr('first.txt', medline_data)
+            archive.writestr('second.txt', medline_data)
+        zipped.seek(0)
+        records = list(MedlineRecord.parse(zipped))
+        self.assertEqual([r._first_raw_value('PMID') for r in records],
+                         ['123456', '654321', '123456', '654321'])
+
+    def test_joining_zip_members_without_final_newlines(self):
+        zipped = io.BytesIO()
+        with zipfile.ZipFile(zipped, 'w') as archive:
+            archive.writestr('a.ris', b'TY  - JOUR\nTI  - First\nER  - ')
+            archive.writestr('empty.ris', b'')
+            archive.writestr('b.ris', b'TY  - JOUR\nTI  - Second\nER  - \n')
+            archive.writestr('c.ris', b'TY  - JOUR\nTI  - Third\nER  - ')
+        zipped.seek(0)
+        self.assertEqual([r.title for r in RISRecord.parse(zipped)],
+                         ['First', 'Second', 'Third'])
+
+    def test_parsing_uncompressed_binary_files(self):
+        self.assertIsNone(compression(io.BytesIO(self.data)))
+        self.assertEqual(
+            [r._raw_data for r in RISRecord.parse(io.BytesIO(self.data))],
+            self.expected)
+
+    def test_decoding_binary_data(self):
+        """
+        Parse data with a byte order mark, CRLF line endings and an invalid
+        byte through the binary entry points and check that the records
+        match the ones parsed from clean text.
+        """
+        data = b'\xef\xbb\xbf' + self.data.replace(b'\n', b'\r\n') \
+            .replace(b'Hashimoto', b'Hashimoto\xff')
+        expected = [raw.replace('Hashimoto', 'Hashimoto\ufffd')
+                    for raw in self.expected]
+        path = self.write('bom.ris', data.replace(b'\xff', b''))
+
+        parsed = RISRecord.parse(io.BytesIO(data), encoding_errors='replace')
+        self.assertEqual([r._raw_data for r in parsed], expected)
+
+        parser = IncrementalParser(RISRecord, encoding_errors='replace')
+        parsed = []
+        for i in range(0, len(data), 2):
+            parsed += parser.feed(data[i:i + 2])
+        parsed += parser.close()
+        self.assertEqual([r._raw_data for r in parsed], expected)
+
+        parsed = RISRecord.parse_file(path)
+        self.assertEqual([r._first_raw_value('ID') for r in parsed],
+                         ['123456', '654321'])
+
+        with self.assertRaises(UnicodeDecodeError):
+            list(RISRecord.parse(io.BytesIO(data)))
+
+    def test_rejecting_encodings_incompatible_with_ascii(self):
+        for encoding in ('utf-16', 'utf-32-le'):
+            with self.subTest(encoding=encoding):
+                with self.assertRaises(ValueError):
+                    IncrementalParser(RISRecord, encoding=encoding)
+                stream = RISRecord.aparse(self.chunks(), encoding=encoding)
+                with self.assertRaises(ValueError):
+                    asyncio.run(stream.__anext__())
+        parser = IncrementalParser(RISRecord, encoding='latin-1')
+        parsed = parser.feed(self.data) + parser.close()
+        self.assertEqual([r._raw_data for r in parsed], self.expected)
+
+    async def chunks(self):
+        yield self.data
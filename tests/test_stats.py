@@ -0,0 +1,68 @@
+import collections
+import unittest
+from refparser.parsers import RISRecord, MedlineRecord, CompactRISRecord, \
+    PubmedXMLRecord, IncrementalParser, parse_any
+from refparser.stats import ParseStats, stages
+
+
+class TestParseStats(unittest.TestCase):
+    files = (
+        ('test_data/ris/valid.ris', RISRecord),
+        ('test_data/ris/valid.ris', CompactRISRecord),
+        ('test_data/pubmed/complex_record.txt', MedlineRecord),
+        ('test_data/pubmed/valid.xml', PubmedXMLRecord),
+    )
+
+    def test_counting_records_and_fields(self):
+        for filename, record_type in self.files:
+            with self.subTest(filename=filename, record_type=record_type):
+                stats = ParseStats()
+                records = list(record_type.parse(filename, stats=stats))
+                self.assertEqual(stats.records, len(records))
+                self.assertEqual(stats.bytes, sum(
+                    len(r._raw_data.encode('utf-8')) for r in records))
+                expected = collections.Counter(
+                    field for r in records for field, value in r.raw_fields())
+                self.assertEqual(stats.fields, expected)
+
+    def test_timing_stages(self):
+        for filename, record_type in self.files:
+            with self.subTest(filename=filename, record_type=record_type):
+                stats = ParseStats()
+                records = list(record_type.parse(filename, stats=stats))
+                self.assertEqual(stats.timings['fingerprinting'], 0)
+                fingerprints = [(r.location_fingerprint,
+                                 r.title_authors_fingerprint)
+                                for r in records]
+                self.assertEqual(set(stats.timings), set(stages))
+                self.assertGreater(stats.timings['splitting'], 0)
+                self.assertGreater(stats.timings['fingerprinting'], 0)
+                self.assertLessEqual(stats.timings['normalization'],
+                                     stats.timings['fingerprinting'])
+                self.assertEqual(fingerprints, [
+                    (r.location_fingerprint, r.title_authors_fingerprint)
+                    for r in record_type.parse(filename)])
+
+    def test_parsing_without_stats(self):
+        record = next(RISRecord.parse('test_data/ris/valid.ris'))
+        self.assertIsNone(record._stats)
+        record = next(CompactRISRecord.parse_file('test_data/ris/valid.ris'))
+        self.assertIsNone(record._stats)
+
+    def test_observing_other_sources(self):
+        filename = 'test_data/ris/valid.ris'
+        with open(filename, 'rb') as f:
+            data = f.read()
+        parser = IncrementalParser(RISRecord)
+        sources = (
+            lambda stats: RISRecord.parse_file(filename, stats=stats),
+            lambda stats: parse_any(filename, stats=stats),
+            lambda stats: stats.observe(parser.feed(data) + parser.close()),
+        )
+        for source in sources:
+            stats = ParseStats()
+            records = list(source(stats))
+            self.assertEqual(stats.records, len(records))
+            self.assertEqual(stats.as_dict()['bytes'], sum(
+                len(r._raw_data.encode('utf-8')) for r in records))
+            self.assertTrue(all(r._stats is stats for r in records))
@@ -0,0 +1,101 @@
+import io
+import unittest
+from refparser.batch import RecordBatch
+from refparser.parsers import RISRecord, MedlineRecord, CompactRISRecord
+from refparser.writers import RISWriter, MedlineWriter
+
+
+def parse_file(record_type, filename):
+    with open(filename, encoding='utf-8') as f:
+        return list(record_type.parse(f))
+
+
+class TestWriters(unittest.TestCase):
+    files = (
+        ('test_data/ris/valid.ris', RISRecord, RISWriter),
+        ('test_data/ris/valid.ris', CompactRISRecord, RISWriter),
+        ('test_data/pubmed/valid.txt', MedlineRecord, MedlineWriter),
+        ('test_data/pubmed/complex_record.txt', MedlineRecord, MedlineWriter),
+    )
+
+    def test_round_trip(self):
+        """
+        Write records in their own format and check that parsing the output
+        gives back the same fields.
+        """
+        for filename, record_type, writer_type in self.files:
+            with self.subTest(filename=filename, record_type=record_type):
+                records = parse_file(record_type, filename)
+                out = io.StringIO()
+                with writer_type(out) as writer:
+                    writer.write_all(records)
+                written = list(record_type.parse(io.StringIO(out.getvalue())))
+                self.assertEqual([list(r.raw_fields()) for r in written],
+                                 [list(r.raw_fields()) for r in records])
+
+    def test_converting_formats(self):
+        """
+        Write records in the other format and check that the parsed output
+        has the same fingerprints.
+        """
+        conversions = (
+            ('test_data/ris/valid.ris', RISRecord, MedlineWriter,
+             MedlineRecord),
+            ('test_data/pubmed/valid.txt', MedlineRecord, RISWriter,
+             RISRecord),
+        )
+        for filename, record_type, writer_type, output_type in conversions:
+            with self.subTest(filename=filename, writer_type=writer_type):
+                records = parse_file(record_type, filename)
+                out = io.StringIO()
+                with writer_type(out) as writer:
+                    writer.write_all(records)
+                written = list(output_type.parse(io.StringIO(out.getvalue())))
+                for name in ('title', 'location_fingerprint',
+                             'title_authors_fingerprint'):
+                    self.assertEqual([getattr(r, name) for r in written],
+                                     [getattr(r, name) for r in records])
+
+    def test_writing_batches(self):
+        records = parse_file(MedlineRecord, 'test_data/pubmed/valid.txt')
+        out = io.StringIO()
+        with RISWriter(out) as writer:
+            writer.write_batch(RecordBatch.from_records(records))
+        written = list(RISRecord.parse(io.StringIO(out.getvalue())))
+        self.assertEqual([r.title_authors_fingerprint for r in written],
+                         [r.title_authors_fingerprint for r in records])
+
+    def test_wrapping_continuation_lines(self):
+        out = io.StringIO()
+        with MedlineWriter(out) as writer:
+            writer._append(writer.format_record([('AB', 'word ' * 40)]))
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('AB  - word'))
+        self.assertGreater(len(lines), 3)
+        for line in lines[1:-1]:
+            self.assertTrue(line.startswith('      word'))
+        self.assertTrue(all(len(line) <= 80 for line in lines))
+
+    def test_converting_values_with_blank_lines(self):
+        record = RISRecord('TY  - JOUR\nTI  - Title\nAU  - Smith, J\n'
+                           'AB  - First part\nAB  - \nER  - \n')
+        out = io.StringIO()
+        with MedlineWriter(out) as writer:
+            writer.write(record)
+        self.assertNotIn('\n      \n', out.getvalue())
+        written = list(MedlineRecord.parse(io.StringIO(out.getvalue())))
+        self.assertEqual(len(written), 1)
+        self.assertEqual(written[0].title, 'Title')
+        self.assertEqual(written[0].authors, ['Smith, J'])
+        self.assertEqual(written[0].abstract, 'First part')
+
+    def test_writing_in_blocks(self):
+        records = parse_file(RISRecord, 'test_data/ris/valid.ris')
+        out = io.StringIO()
+        writes = []
+        out.write = writes.append
+        writer = RISWriter(out)
+        writer.write_all(records)
+        self.assertEqual(writes, [])
+        writer.flush()
+        self.assertEqual(len(writes), 1)
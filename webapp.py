@@ -14,13 +14,20 @@ except ImportError:
     import sys
     sys.exit('Unable to run the web app: bottle is missing.\n' + __doc__)
 
-from refparser.parsers import RISRecord, MedlineRecord
+from refparser.parsers import RISRecord, MedlineRecord, IncrementalParser, \
+    detect_format
+from refparser.limits import SizeLimits
+from refparser.matching import all_matches
 
 accepted_file_formats = {
+    'Auto-detect': None,
     'RIS': RISRecord,
     'Medline': MedlineRecord,
 }
 
+# keeps a malformed upload from growing a single record without bound
+upload_limits = SizeLimits(record=4 << 20, field=1 << 20)
+
 @get('/')
 def index():
     return \
@@ -32,6 +39,7 @@ def index():
     <p>File 1
         <input type="file" name="file1">
         <select name="type1">
+            <option>Auto-detect
             <option>RIS
             <option>Medline
         </select>
@@ -39,6 +47,7 @@ def index():
     <p>File 2
         <input type="file" name="file2">
         <select name="type2">
+            <option>Auto-detect
             <option>RIS
             <option>Medline
         </select>
@@ -118,33 +127,17 @@ post_json = \
 </html>
 """
 
-def _decoded_lines(lines):
-    yield from (line.decode('utf-8') for line in lines)
-
-def all_matches(list1, list2):
-    list1_location_idx = {}
-    list1_title_authors_idx = {}
-    for record in list1:
-        if record.location_fingerprint:
-            list1_location_idx[record.location_fingerprint] = record
-        if record.title_authors_fingerprint:
-            list1_title_authors_idx[record.title_authors_fingerprint] = record
-
-    for record in list2:
-        match = None
-        if record.location_fingerprint:
-            match = list1_location_idx.get(record.location_fingerprint)
-
-        if not match and record.title_authors_fingerprint:
-            match = list1_title_authors_idx.get(record.title_authors_fingerprint)
-
-        if match:
-            try:
-                del list1_location_idx[match.location_fingerprint]
-                del list1_title_authors_idx[match.title_authors_fingerprint]
-            except KeyError:
-                pass
-            yield (record, match)
+def _parse_upload(record_type, upload, chunk_size=65536):
+    chunk = upload.read(chunk_size)
+    if record_type is None:
+        record_type = detect_format(chunk[:4096])
+    parser = IncrementalParser(record_type, encoding_errors='replace',
+                               limits=upload_limits)
+    records = parser.feed(chunk)
+    for chunk in iter(lambda: upload.read(chunk_size), b''):
+        records += parser.feed(chunk)
+    records += parser.close()
+    return records
 
 import json
 def side_by_side_json(record1, record2):
@@ -162,14 +155,9 @@ def handle_post():
         accepted_file_formats[request.forms.type2]
     )
 
-    files = (
-        _decoded_lines(request.files.file1.file),
-        _decoded_lines(request.files.file2.file)
-    )
-
     record_lists = (
-        list(record_types[0].parse(files[0])),
-        list(record_types[1].parse(files[1])),
+        _parse_upload(record_types[0], request.files.file1.file),
+        _parse_upload(record_types[1], request.files.file2.file),
     )
 
     yield pre_json